@@ -0,0 +1,69 @@
+from collections import OrderedDict
+
+import pygame
+
+# Shared surfaces and fonts, built once and never mutated by sprites
+images, fonts = {}, {}
+alpha_kinds = ('circle', 'ellipse')
+
+# Rendered strings, least recently used ones are dropped past max_texts
+texts, max_texts = OrderedDict(), 512
+
+
+def font(size, name=None):
+	key = (name, size)
+	if key not in fonts:
+		fonts[key] = pygame.font.SysFont(name, size)
+	return fonts[key]
+
+
+def text(font, string, color, bg=None):
+	key = (font, string, color, bg)
+	surface = texts.get(key)
+	if surface is not None:
+		texts.move_to_end(key)
+		return surface
+	surface = font.render(string, True, color)
+	if bg:
+		# Background box is baked in, 2px around the text like the old draw_text
+		boxed = pygame.Surface(surface.get_rect().inflate(4, 4).size)
+		boxed.fill(bg)
+		boxed.blit(surface, (2, 2))
+		surface = boxed
+	texts[key] = surface
+	if len(texts) > max_texts:
+		texts.popitem(last=False)
+	return surface
+
+
+def image(kind, size, color, text=None):
+	key = (kind, size, color, text)
+	surface = images.get(key)
+	if surface is None:
+		surface = images[key] = build(kind, size, color, text)
+	return surface
+
+
+def build(kind, size, color, text):
+	if kind == 'rect':
+		surface = pygame.Surface(size)
+		surface.fill(color)
+	elif kind == 'circle':
+		surface = pygame.Surface(size, pygame.SRCALPHA)
+		pygame.draw.circle(surface, color, (size[0] // 2, size[1] // 2), size[0] // 2)
+	elif kind == 'ellipse':
+		surface = pygame.Surface(size, pygame.SRCALPHA)
+		pygame.draw.ellipse(surface, color, [0, 0, *size])
+	elif kind == 'label':
+		# size is the font size, color is (text color, background color)
+		fg, bg = color
+		txt = font(size).render(text, True, fg)
+		surface = pygame.Surface(txt.get_size())
+		surface.fill(bg)
+		surface.blit(txt, (0, 0))
+	else:
+		raise ValueError(f'unknown asset kind {kind!r}')
+	# Match the display format when there is one, headless runs keep plain surfaces
+	if pygame.display.get_init() and pygame.display.get_surface() is not None:
+		surface = surface.convert_alpha() if kind in alpha_kinds else surface.convert()
+	return surface
@@ -0,0 +1,144 @@
+import argparse
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pygame
+
+import snapshot
+from engine import WIDTH, HEIGHT, World, difficulty_settings, no_keys, weapon_names
+
+
+# Scripted player: backs away from the nearest enemy when one is close, otherwise walks to the nearest banana
+class Bot:
+	flee_distance = 200
+
+	def __init__(self, world, build, seed):
+		self.world, self.build = world, build
+		self.rng = random.Random(seed)
+		self.keys = dict(no_keys)
+		world.choose_weapon = self.choose_weapon
+
+	def choose_weapon(self, choices):
+		# 'first' takes what headless runs take, 'random' picks any, 'focus:<weapon>' takes that weapon when offered
+		# and otherwise upgrades whatever it already has most of
+		if self.build == 'random':
+			return self.rng.choice(choices)
+		if self.build.startswith('focus:'):
+			focus = self.build[6:]
+			if focus in choices:
+				return focus
+			weapons = self.world.player.weapons
+			return max(choices, key=lambda name: weapons[name].level if name in weapons else 0)
+		return choices[0]
+
+	def keys_for_frame(self):
+		world, keys = self.world, self.keys
+		px, py = world.player.rect.center
+		dx = dy = 0
+		enemy = world.enemy_grid.nearest((px, py))
+		if enemy is not None and math.hypot(enemy.rect.centerx - px, enemy.rect.centery - py) < self.flee_distance:
+			dx, dy = px - enemy.rect.centerx, py - enemy.rect.centery
+			# Pinned against a wall, slide along it instead
+			if not 60 < px < WIDTH - 60: dx, dy = WIDTH / 2 - px, dy or 1
+			if not 60 < py < HEIGHT - 60: dx, dy = dx or 1, HEIGHT / 2 - py
+		elif world.collectibles:
+			banana = min(world.collectibles, key=lambda b: math.hypot(b.rect.centerx - px, b.rect.centery - py))
+			dx, dy = banana.rect.centerx - px, banana.rect.centery - py
+		keys[pygame.K_LEFT], keys[pygame.K_RIGHT] = dx < -2, dx > 2
+		keys[pygame.K_UP], keys[pygame.K_DOWN] = dy < -2, dy > 2
+		return keys
+
+
+def play(difficulty, build, seed, max_frames, checkpoint=None):
+	# With a checkpoint the run branches from that saved state instead of starting over
+	world = snapshot.load(checkpoint) if checkpoint else World(difficulty, seed)
+	bot = Bot(world, build, seed)
+	while world.clock.frame < max_frames and not world.game_over:
+		world.step(bot.keys_for_frame())
+	frames = world.clock.frame
+	player = world.player
+	return {'difficulty': difficulty, 'build': build, 'seed': seed, 'frames': frames,
+	        'survival_s': world.elapsed_time, 'died': world.game_over, 'level': player.level,
+	        'weapons': {name: weapon.level for name, weapon in player.weapons.items()},
+	        'damage_stats': dict(world.damage_stats)}
+
+
+def checkpoint(difficulty, seed, frames):
+	# Shared opening for --branch-at, played with the 'first' build
+	world = World(difficulty, seed)
+	bot = Bot(world, 'first', seed)
+	while world.clock.frame < frames and not world.game_over:
+		world.step(bot.keys_for_frame())
+	return snapshot.save(world)
+
+
+def aggregate(results):
+	# One summary per (difficulty, build), damage is the mean per run including runs where the weapon never showed up
+	groups = {}
+	for result in results:
+		groups.setdefault((result['difficulty'], result['build']), []).append(result)
+	summary = []
+	for (difficulty, build), runs in groups.items():
+		survival = np.array([r['survival_s'] for r in runs])
+		damage = {}
+		for r in runs:
+			for name, amount in r['damage_stats'].items():
+				damage[name] = damage.get(name, 0) + amount
+		summary.append({
+			'difficulty': difficulty, 'build': build, 'runs': len(runs),
+			'deaths': sum(r['died'] for r in runs),
+			'survival_mean_s': round(float(survival.mean()), 2),
+			'survival_p10_s': float(np.percentile(survival, 10)),
+			'survival_p50_s': float(np.percentile(survival, 50)),
+			'survival_p90_s': float(np.percentile(survival, 90)),
+			'level_mean': round(float(np.mean([r['level'] for r in runs])), 2),
+			'damage_mean': {name: round(total / len(runs), 1) for name, total in sorted(damage.items())},
+		})
+	return summary
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Play many scripted runs in parallel and summarize balance")
+	parser.add_argument('--runs', type=int, default=100, help='runs per difficulty and build')
+	parser.add_argument('--difficulties', nargs='+', choices=list(difficulty_settings),
+	                    default=list(difficulty_settings))
+	parser.add_argument('--builds', nargs='+', default=['first', 'random'] + [f'focus:{w}' for w in weapon_names],
+	                    help="'first', 'random' or 'focus:<weapon>'")
+	parser.add_argument('--max-frames', type=int, default=60 * 60 * 10, help='cap per run, 10 sim minutes by default')
+	parser.add_argument('--seed', type=int, default=0, help='first seed, every build plays the same seeds')
+	parser.add_argument('--branch-at', type=int, metavar='FRAMES',
+	                    help="play the first FRAMES of each seed once with the 'first' build and branch every build "
+	                         "from that snapshot")
+	parser.add_argument('--workers', type=int, default=os.cpu_count())
+	parser.add_argument('--output', default='balance.json')
+	args = parser.parse_args()
+	seeds = [(difficulty, args.seed + i) for difficulty in args.difficulties for i in range(args.runs)]
+	start = time.perf_counter()
+	with ProcessPoolExecutor(args.workers) as executor:
+		checkpoints = {}
+		if args.branch_at:
+			saved = executor.map(checkpoint, *zip(*seeds), [args.branch_at] * len(seeds))
+			checkpoints = dict(zip(seeds, saved))
+		jobs = [(difficulty, build, seed, args.max_frames, checkpoints.get((difficulty, seed)))
+		        for difficulty, seed in seeds for build in args.builds]
+		results = list(executor.map(play, *zip(*jobs), chunksize=max(1, len(jobs) // (args.workers * 8))))
+	duration = time.perf_counter() - start
+	summary = aggregate(results)
+	frames = sum(r['frames'] for r in results)
+	print(f'{len(results)} runs, {frames} frames in {duration:.1f}s on {args.workers} workers '
+	      f'({frames / max(duration, 1e-9):.0f} frames/s)')
+	for s in summary:
+		print(f"{s['difficulty']:<7} {s['build']:<22} survival {s['survival_mean_s']:7.1f}s "
+		      f"(p10 {s['survival_p10_s']:.0f} p50 {s['survival_p50_s']:.0f} p90 {s['survival_p90_s']:.0f})  "
+		      f"deaths {s['deaths']}/{s['runs']}  level {s['level_mean']:.1f}")
+	with open(args.output, 'w') as f:
+		json.dump({'summary': summary, 'runs': results}, f, indent=1)
+
+
+if __name__ == '__main__':
+	main()
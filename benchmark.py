@@ -0,0 +1,159 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+
+try:
+	import resource
+except ImportError:
+	# Windows has no getrusage
+	resource = None
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+from engine import WIDTH, HEIGHT, World, Enemy, BabulerBoss, no_keys
+from frame_timer import FrameTimer, phases
+
+
+# Scenario setups, each gets a fresh seeded World. The player can't die so every run lasts its full length
+def immortal(world):
+	player = world.player
+	player.health = player.max_health = 10 ** 9
+
+
+def enemies(count):
+	def setup(world):
+		immortal(world)
+		world.add_weapon('Pistol')
+		for _ in range(count):
+			world.spawn_enemy(Enemy(world, 10 ** 6))
+	return setup
+
+
+def all_weapons(world):
+	immortal(world)
+	for name in world.weapon_classes:
+		for _ in range(3):
+			world.add_weapon(name)
+
+
+def babuler_bosses(world):
+	immortal(world)
+	world.add_weapon('Pistol')
+	for _ in range(5):
+		world.spawn_enemy(BabulerBoss(world, 10 ** 5))
+
+
+def long_drone(world):
+	immortal(world)
+	for _ in range(6):
+		world.add_weapon('Drone')
+
+
+scenarios = {
+	'enemies_500': (enemies(500), 600),
+	'enemies_2000': (enemies(2000), 600),
+	'enemies_10000': (enemies(10000), 300),
+	'all_weapons_lvl3': (all_weapons, 3600),
+	'babuler_bosses': (babuler_bosses, 3600),
+	'long_drone': (long_drone, 18000),
+}
+
+
+def peak_rss_kb():
+	# Peak resident memory of this process in KiB, None where it can't be read
+	if resource is None:
+		return None
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# macOS reports bytes, Linux and the BSDs KiB
+	return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run(name, seed=1, frames=None, render=None, enemy_budget=None, swarm_size=None):
+	setup, default_frames = scenarios[name]
+	frames = frames or default_frames
+	world = World(seed=seed)
+	setup(world)
+	world.enemy_budget = enemy_budget or world.enemy_budget
+	world.swarm_size = swarm_size or world.swarm_size
+	timer = FrameTimer(window=1)
+	world.timer = timer
+	renderer = None
+	if render:
+		from hud import Hud
+		from render import Renderer, DirtyRenderer
+		import assets
+		screen = pygame.display.set_mode((WIDTH, HEIGHT))
+		renderer = (DirtyRenderer if render == 'dirty' else Renderer)(screen, Hud((WIDTH, HEIGHT), assets.font(18)))
+		renderer.timer = timer
+	totals, sums = [], dict.fromkeys(phases, 0.0)
+	for _ in range(frames):
+		timer.begin()
+		world.step(no_keys)
+		if renderer:
+			renderer.draw(world)
+		row = timer.end(world)
+		totals.append(row['total_ms'])
+		for phase in phases:
+			sums[phase] += row[phase]
+	totals = np.array(totals)
+	return {
+		'scenario': name, 'seed': seed, 'frames': frames, 'render': render or 'none',
+		'mean_ms': round(float(totals.mean()), 4),
+		'p50_ms': round(float(np.percentile(totals, 50)), 4),
+		'p90_ms': round(float(np.percentile(totals, 90)), 4),
+		'p99_ms': round(float(np.percentile(totals, 99)), 4),
+		'max_ms': round(float(totals.max()), 4),
+		# Each scenario runs in its own process so this is its own peak
+		'peak_rss_kb': peak_rss_kb(),
+		'phases_mean_ms': {phase: round(t / frames, 4) for phase, t in sums.items() if t},
+		'counts': {key: value for key, value in row.items() if key.endswith('_count')},
+		'game_over': world.game_over,
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Run headless stress scenarios and report ms/frame percentiles")
+	parser.add_argument('scenarios', nargs='*', help=f'any of {", ".join(scenarios)}, all of them by default')
+	parser.add_argument('--seed', type=int, default=1)
+	parser.add_argument('--frames', type=int, help='override every scenario\'s frame count')
+	parser.add_argument('--render', choices=['full', 'dirty'], help='also draw each frame to an offscreen display')
+	parser.add_argument('--enemy-budget', type=int, help='live enemies before new spawns are folded into swarms')
+	parser.add_argument('--swarm-size', type=int, help='spawns per swarm before regular enemies are merged')
+	parser.add_argument('--output', default='benchmark.json', help='where to write the JSON results')
+	parser.add_argument('--compare', metavar='BASELINE', help='earlier results to print p50/p99 deltas against')
+	args = parser.parse_args()
+	names = args.scenarios or list(scenarios)
+	for name in names:
+		if name not in scenarios:
+			parser.error(f'unknown scenario {name}')
+	# A fresh process per scenario keeps peak memory and caches from leaking between runs
+	context = multiprocessing.get_context('spawn')
+	results = []
+	with context.Pool(1, maxtasksperchild=1) as pool:
+		for name in names:
+			result = pool.apply(run, (name, args.seed, args.frames, args.render, args.enemy_budget,
+			                               args.swarm_size))
+			results.append(result)
+			print(f"{name:<18} {result['frames']:>6} frames  mean {result['mean_ms']:8.3f}  "
+			      f"p50 {result['p50_ms']:8.3f}  p90 {result['p90_ms']:8.3f}  p99 {result['p99_ms']:8.3f}  "
+			      f"max {result['max_ms']:8.3f} ms  "
+			      f"peak {'n/a' if result['peak_rss_kb'] is None else result['peak_rss_kb'] // 1024} MiB")
+	with open(args.output, 'w') as f:
+		json.dump(results, f, indent=1)
+	if args.compare:
+		with open(args.compare) as f:
+			baseline = {(r['scenario'], r['render']): r for r in json.load(f)}
+		for result in results:
+			base = baseline.get((result['scenario'], result['render']))
+			if base:
+				print(f"{result['scenario']:<18} p50 {result['p50_ms'] / base['p50_ms'] - 1:+7.1%}  "
+				      f"p99 {result['p99_ms'] / base['p99_ms'] - 1:+7.1%}")
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,84 @@
+import numpy as np
+
+
+# One row per hit, handed to subscribers after each resolve
+event_dtype = np.dtype([('tick', np.int32), ('slot', np.int32), ('kind', np.int8), ('weapon', np.int16),
+                        ('amount', np.int64), ('killed', bool)])
+
+
+# Damage dealt during a step, buffered as enemy store slots and resolved in one pass at the end of it
+class DamageEvents:
+	def __init__(self, capacity=1024):
+		self.count = 0
+		self.slot = np.zeros(capacity, np.int32)
+		self.weapon = np.zeros(capacity, np.int16)
+		self.amount = np.zeros(capacity, np.int64)
+		self.weapon_ids, self.weapon_names = {}, []
+		# Called with (world, events) after every resolve that had hits, events is a fresh event_dtype array
+		self.subscribers = []
+
+	def clear(self):
+		self.count = 0
+
+	def reserve(self, extra):
+		n = self.count
+		if n + extra > len(self.slot):
+			capacity = max(len(self.slot) * 2, n + extra)
+			for name in ('slot', 'weapon', 'amount'):
+				old = getattr(self, name)
+				new = np.zeros(capacity, old.dtype)
+				new[:n] = old[:n]
+				setattr(self, name, new)
+
+	def weapon_id(self, weapon):
+		weapon_id = self.weapon_ids.get(weapon)
+		if weapon_id is None:
+			weapon_id = self.weapon_ids[weapon] = len(self.weapon_names)
+			self.weapon_names.append(weapon)
+		return weapon_id
+
+	def add(self, enemy, amount, weapon):
+		self.reserve(1)
+		n = self.count
+		self.slot[n], self.weapon[n], self.amount[n] = enemy.slot, self.weapon_id(weapon), amount
+		self.count = n + 1
+
+	def add_slots(self, slots, amount, weapon):
+		# Same hit on many enemy store slots at once
+		m = len(slots)
+		self.reserve(m)
+		n = self.count
+		self.slot[n:n + m], self.weapon[n:n + m], self.amount[n:n + m] = slots, self.weapon_id(weapon), amount
+		self.count = n + m
+
+	def resolve(self, world):
+		# Subtracts health, kills, tallies damage_stats and awards exp for the whole step at once. Exp goes out
+		# last, so a level up never interrupts a collision loop
+		n = self.count
+		if not n:
+			return
+		self.count = 0
+		slot, weapon, amount = self.slot[:n], self.weapon[:n], self.amount[:n]
+		store, damage_stats = world.enemy_store, world.damage_stats
+		np.subtract.at(store.health, slot, amount)
+		totals = np.bincount(weapon, weights=amount)
+		for weapon_id in np.flatnonzero(totals).tolist():
+			name = self.weapon_names[weapon_id]
+			damage_stats[name] = damage_stats.get(name, 0) + int(totals[weapon_id])
+		hit = np.unique(slot)
+		exp, killed = 0, []
+		for s in hit[store.health[hit] <= 0].tolist():
+			enemy = store.sprites[s]
+			if enemy.alive():
+				enemy.kill()
+				killed.append(s)
+				exp += int(store.exp[s])
+		if self.subscribers:
+			events = np.zeros(n, event_dtype)
+			events['tick'], events['slot'], events['kind'] = world.clock.frame, slot, store.kind[slot]
+			events['weapon'], events['amount'] = weapon, amount
+			events['killed'] = np.isin(slot, killed)
+			for subscriber in self.subscribers:
+				subscriber(world, events)
+		if exp:
+			world.player.add_exp(exp)
@@ -0,0 +1,103 @@
+import numpy as np
+
+from slot_store import SlotStore
+
+
+# Struct-of-arrays enemy state, Enemy and BossEnemy sprites are views over one slot each
+class EnemyStore(SlotStore):
+	ENEMY, BOSS = 0, 1
+	fields = {'x': float, 'y': float, 'speed': float, 'health': float, 'contact_damage': float, 'w': float,
+	          'h': float, 'kind': np.int8, 'serial': np.int64, 'exp': np.int64}
+	# Cell size of the area query index
+	cell_size = 64
+
+	def __init__(self, capacity=256):
+		super().__init__(capacity)
+		self.serials, self.index = 0, None
+
+	def clear(self):
+		super().clear()
+		self.index = None
+
+	def add(self, sprite, kind, speed, health, contact_damage, exp):
+		slot = self.alloc(sprite)
+		# Serials never repeat, unlike slots, so they can identify an enemy across recycling
+		self.serials += 1
+		self.serial[slot] = self.serials
+		self.index = None
+		self.x[slot], self.y[slot] = sprite.rect.center
+		self.w[slot], self.h[slot] = sprite.rect.size
+		self.kind[slot], self.speed[slot], self.health[slot] = kind, speed, health
+		self.contact_damage[slot], self.exp[slot] = contact_damage, exp
+		return slot
+
+	def step(self, world):
+		# Steer every live enemy toward the player and apply contact damage in one pass
+		idx = self.live_slots()
+		if not idx.size:
+			return
+		player = world.player
+		px, py = player.rect.center
+		x, y, speed = self.x[idx], self.y[idx], self.speed[idx]
+		angle = np.arctan2(py - y, px - x)
+		x += np.cos(angle) * speed
+		y += np.sin(angle) * speed
+		self.x[idx], self.y[idx] = x, y
+		self.index = None
+		sprites = self.sprites
+		for slot, cx, cy in zip(idx.tolist(), np.rint(x).astype(int).tolist(), np.rint(y).astype(int).tolist()):
+			sprites[slot].rect.center = (cx, cy)
+		touching = (np.abs(x - px) * 2 < self.w[idx] + player.rect.width) & (
+				np.abs(y - py) * 2 < self.h[idx] + player.rect.height)
+		if touching.any():
+			hit = idx[touching]
+			player.health -= int(self.contact_damage[hit].sum())
+			# Regular enemies die on contact, bosses keep pushing
+			for slot in hit[self.kind[hit] == self.ENEMY].tolist():
+				sprites[slot].kill()
+			if player.health <= 0:
+				world.game_over = True
+
+	def build_index(self):
+		# Live slots sorted by the cell holding their center, one row of cells is one key range
+		idx = self.live_slots()
+		size = self.cell_size
+		cx, cy = np.floor_divide(self.x[idx], size).astype(int), np.floor_divide(self.y[idx], size).astype(int)
+		if not idx.size:
+			self.index = (idx, idx, 0, 0, 1, 0, 0.0)
+			return self.index
+		x0, y0 = cx.min(), cy.min()
+		cols, rows = cx.max() - x0 + 1, cy.max() - y0 + 1
+		keys = (cy - y0) * cols + (cx - x0)
+		order = np.argsort(keys, kind='stable')
+		reach = max(self.w[idx].max(), self.h[idx].max()) / 2
+		self.index = (idx[order], keys[order], x0, y0, cols, rows, reach)
+		return self.index
+
+	def circle_query(self, x, y, radius):
+		# Live slots whose box overlaps the circle at (x, y)
+		slots, keys, x0, y0, cols, rows, reach = self.index or self.build_index()
+		size, span = self.cell_size, radius + reach
+		left, right = max(int((x - span) // size) - x0, 0), min(int((x + span) // size) - x0, cols - 1)
+		top, bottom = max(int((y - span) // size) - y0, 0), min(int((y + span) // size) - y0, rows - 1)
+		if left > right or top > bottom:
+			return slots[:0]
+		row_keys = np.arange(top, bottom + 1) * cols
+		starts, ends = np.searchsorted(keys, row_keys + left), np.searchsorted(keys, row_keys + right, 'right')
+		found = np.concatenate([slots[start:end] for start, end in zip(starts.tolist(), ends.tolist())])
+		found = found[self.alive[found]]
+		half_w, half_h = self.w[found] / 2, self.h[found] / 2
+		ex, ey = self.x[found], self.y[found]
+		dx = x - np.minimum(np.maximum(ex - half_w, x), ex + half_w)
+		dy = y - np.minimum(np.maximum(ey - half_h, y), ey + half_h)
+		return found[dx * dx + dy * dy <= radius * radius]
+
+	def release(self, sprite, slot):
+		sprite.final_health = float(self.health[slot])
+
+	def cull(self):
+		# Kill anything left at zero health, then recycle the slots of everything that died this frame
+		idx = self.live_slots()
+		for slot in idx[self.health[idx] <= 0].tolist():
+			self.sprites[slot].kill()
+		self.recycle()
@@ -0,0 +1,1094 @@
+import argparse
+import csv
+import math
+import numpy as np
+import pygame
+import random
+import time
+from collections import deque
+
+import assets
+from damage_events import DamageEvents
+from enemy_store import EnemyStore
+from frame_timer import null_timer
+from pool import Pooled, Pools
+from projectile_store import ProjectileStore
+from scheduler import Scheduler
+from spatial import SpatialHash
+from trail import Trail
+
+pygame.init()
+
+# Screen settings
+WIDTH, HEIGHT = 800, 600
+SCREEN_RECT = pygame.Rect(0, 0, WIDTH, HEIGHT)
+
+# Game settings
+difficulty_settings = {"Easy": (1, 2000), "Normal": (5, 1500), "Hard": (10, 500)}
+weapon_names = ["Pistol", "Shotgun", "SniperRifle", "RocketLauncher", "Rifle", "MachineGun", "Sword", "Drone"]
+# Live enemies before new spawns are folded into swarms, and how many spawns one swarm takes before
+# regular enemies are merged into new swarms
+enemy_budget = 400
+swarm_size = 10
+
+# Phrases for Babuler
+babuler_phrases = ["7891347", "adsldasj", "asdjklhja87", "dasda2112"]
+
+# Simulated milliseconds per tick
+FPS = 60
+TICK_MS = 1000 / FPS
+
+
+# Helper functions
+def get_angle(src, dest):
+	dx, dy = dest[0] - src[0], dest[1] - src[1]
+	return math.atan2(dy, dx)
+
+
+def clamp(value, min_val, max_val):
+	return max(min_val, min(value, max_val))
+
+
+# Player class
+class Player(pygame.sprite.Sprite):
+	def __init__(self, world):
+		super().__init__()
+		self.world = world
+		self.base_color = (255, 200, 200)
+		self.image = assets.image('circle', (50, 50), self.base_color)
+		self.rect = self.image.get_rect(center=(WIDTH // 2, HEIGHT // 2))
+		self.speed, self.max_health, self.health = 5, 100, 100
+		self.level, self.exp, self.exp_to_lvl = 1, 0, 100
+		self.total_exp = 0
+		# self.weapons = {'Pistol': Pistol(self)}
+		self.weapons = {'SniperRifle': SniperRifle(self)}
+		self.orbit_drones = []
+
+	def update(self, keys):
+		dx, dy = 0, 0
+		if keys[pygame.K_LEFT] or keys[pygame.K_a]: dx -= self.speed
+		if keys[pygame.K_RIGHT] or keys[pygame.K_d]: dx += self.speed
+		if keys[pygame.K_UP] or keys[pygame.K_w]: dy -= self.speed
+		if keys[pygame.K_DOWN] or keys[pygame.K_s]: dy += self.speed
+		self.rect.x, self.rect.y = clamp(self.rect.x + dx, 0, WIDTH - self.rect.width), clamp(self.rect.y + dy, 0,
+		                                                                                      HEIGHT - self.rect.height)
+		# Update color based on health
+		health_ratio = self.health / self.max_health
+		self.base_color = (int(255 * (1 - health_ratio)), int(200 * health_ratio), int(200 * health_ratio))
+		self.image = assets.image('circle', (50, 50), self.base_color)
+		# Update weapons
+		for w in self.weapons.values():
+			w.update()
+		# Update drones
+		for drone in self.orbit_drones:
+			drone.update()
+
+	def add_exp(self, amt):
+		self.exp += amt
+		self.total_exp += amt
+		while self.exp >= self.exp_to_lvl:
+			self.exp -= self.exp_to_lvl
+			self.level += 1
+			self.exp_to_lvl += 50
+			self.world.level_up()
+
+	def level_up(self):
+		self.add_exp(0)  # Trigger level up if exp >= exp_to_lvl
+
+	def find_nearest_enemy(self):
+		return self.world.enemy_grid.nearest(self.rect.center)
+
+
+# Weapon classes
+class Weapon:
+	# Weapons with a shoot_delay call schedule() once it is set and are woken by world.scheduler to fire
+	wake = None
+
+	def __init__(self, player, level=1):
+		self.name = "Weapon"
+		self.level = level
+		self.player, self.world = player, player.world
+		self.last_shot = self.world.ticks()
+
+	def update(self):
+		pass
+
+	def wake_at(self, when, callback):
+		# Replaces the wake-up already queued, if any
+		if self.wake:
+			Scheduler.cancel(self.wake)
+		self.wake = self.world.scheduler.at(when, callback)
+
+	def schedule(self):
+		self.wake_at(self.last_shot + self.shoot_delay, self.shoot)
+
+	def shoot(self):
+		self.last_shot = self.world.ticks()
+		self.schedule()
+		self.fire()
+
+	def fire(self):
+		pass
+
+	def upgrade(self):
+		self.level += 1
+		if self.level == 3:
+			self.upgrade_to_super()
+
+	def upgrade_to_super(self):
+		pass
+
+
+class Pistol(Weapon):
+	colors = {1: (255, 255, 0), 2: (255, 200, 0), 3: (255, 150, 0)}
+
+	def __init__(self, player, level=1):
+		self.name = "Pistol"
+		super().__init__(player, level)
+		self.shoot_delay, self.damage = max(500 - (level - 1) * 50, 200), 10 + (level - 1) * 5
+		self.schedule()
+
+	def fire(self):
+		if self.level >= 3:
+			self.super_fire()
+			return
+
+		player = self.player
+		target = player.find_nearest_enemy()
+		if target:
+			angle = get_angle(player.rect.center, target.rect.center)
+			Projectile.spawn(self.world, player.rect.centerx, player.rect.centery, angle, self.damage,
+			                 self.__class__.__name__, color=self.colors.get(self.level, (255, 255, 0))).add_to_group()
+
+	def super_fire(self):
+		player = self.player
+		target = player.find_nearest_enemy()
+		if target:
+			tmpcenter = list(player.rect.center)
+			tmpcenter[0] += 5
+			angle = get_angle(tmpcenter, target.rect.center)
+			Projectile.spawn(self.world, player.rect.centerx + 5, player.rect.centery, angle, self.damage,
+			                 self.__class__.__name__, color=self.colors.get(self.level, (255, 255, 0))).add_to_group()
+			tmpcenter[0] -= 10
+			angle = get_angle(tmpcenter, target.rect.center)
+			Projectile.spawn(self.world, player.rect.centerx - 5, player.rect.centery, angle, self.damage,
+			                 self.__class__.__name__, color=self.colors.get(self.level, (255, 255, 0))).add_to_group()
+
+
+class Shotgun(Weapon):
+	def __init__(self, player, level=1):
+		self.name = "Shotgun"
+		super().__init__(player, level)
+		self.shoot_delay, self.damage, self.pellets = max(1500 - (level - 1) * 100, 800), 5 + (level - 1) * 2, 5 + (
+				level - 1)
+		self.schedule()
+
+	def fire(self):
+		if self.level >= 3:
+			self.super_fire()
+			return
+		self.volley()
+
+	def volley(self):
+		player = self.player
+		target = player.find_nearest_enemy()
+		if target:
+			center = get_angle(player.rect.center, target.rect.center)
+			for _ in range(self.pellets):
+				angle = center + self.world.rng.uniform(-math.pi / 8, math.pi / 8)
+				Projectile.spawn(self.world, player.rect.centerx, player.rect.centery, angle, self.damage,
+				                 self.__class__.__name__, color=(139, 69, 19)).add_to_group()
+		return target
+
+	def super_fire(self):
+		# A second volley follows 10ms later, the next regular shot counts from it
+		if self.volley():
+			self.wake_at(self.last_shot + 10, self.follow_up)
+
+	def follow_up(self):
+		self.last_shot = self.world.ticks()
+		self.schedule()
+		self.volley()
+
+
+class SniperRifle(Weapon):
+	def __init__(self, player, level=1):
+		self.name = "SniperRifle"
+		super().__init__(player, level)
+		self.shoot_delay, self.damage, self.speed = max(2000 - (level - 1) * 100, 1000), 150 + (level - 1) * 10, 30
+		self.schedule()
+
+	def fire(self):
+		if self.level >= 1:
+			self.super_fire()
+			return
+		player = self.player
+		target = player.find_nearest_enemy()
+		if target:
+			angle = get_angle(player.rect.center, target.rect.center)
+			SniperBullet.spawn(self.world, player.rect.centerx, player.rect.centery, angle, self.damage,
+			                   self.__class__.__name__, speed=self.speed).add_to_group()
+
+	def super_fire(self):
+		player = self.player
+		target = player.find_nearest_enemy()
+		if target:
+			angle = get_angle(player.rect.center, target.rect.center)
+			SuperSniperBullet.spawn(self.world, player.rect.centerx,
+			                        player.rect.centery, angle, self.damage,
+			                        self.__class__.__name__, speed=self.speed).add_to_group()
+
+
+class RocketLauncher(Weapon):
+	def __init__(self, player, level=1):
+		self.name = "RocketLauncher"
+		super().__init__(player, level)
+		self.shoot_delay, self.damage = max(3000 - (level - 1) * 200, 1500), 300 + (level - 1) * 20
+		self.schedule()
+
+	def fire(self):
+		if self.level >= 3:
+			self.super_fire()
+			return
+		player = self.player
+		target = player.find_nearest_enemy()
+		if target:
+			angle = get_angle(player.rect.center, target.rect.center)
+			HomingRocket.spawn(self.world, player.rect.centerx, player.rect.centery, angle, self.damage,
+			                   self.__class__.__name__).add_to_group()
+
+	def super_fire(self):
+		player, rng = self.player, self.world.rng
+		HomingRocket.spawn(self.world, player.rect.centerx, player.rect.centery,
+		                   get_angle(player.rect.center, (rng.randint(0, WIDTH), rng.randint(0, HEIGHT))),
+		                   self.damage, self.__class__.__name__).add_to_group()
+
+
+class Rifle(Weapon):
+	def __init__(self, player, level=1):
+		self.name = "Rifle"
+		super().__init__(player, level)
+		self.shoot_delay, self.damage = max(200 - (level - 1) * 10, 50), 8 + (level - 1) * 2
+		self.schedule()
+
+	def fire(self):
+		if self.level >= 3:
+			self.super_fire()
+			return
+		player = self.player
+		target = player.find_nearest_enemy()
+		if target:
+			angle = get_angle(player.rect.center, target.rect.center)
+			Projectile.spawn(self.world, player.rect.centerx, player.rect.centery, angle, self.damage,
+			                 self.__class__.__name__, color=(0, 255, 0)).add_to_group()
+
+	def super_fire(self):
+		player, rng = self.player, self.world.rng
+		Projectile.spawn(self.world, player.rect.centerx, player.rect.centery,
+		                 get_angle(player.rect.center, (rng.randint(0, WIDTH), rng.randint(0, HEIGHT))),
+		                 self.damage, self.__class__.__name__, color=(0, 255, 0), pierce=True).add_to_group()
+
+
+class MachineGun(Weapon):
+	def __init__(self, player, level=1):
+		self.name = "MachineGun"
+		super().__init__(player, level)
+		self.shoot_delay, self.damage = max(100 - (level - 1) * 5, 20), 5 + (level - 1)
+		self.schedule()
+
+	def fire(self):
+		damage = self.damage
+		if self.level >= 3:
+			damage *= 2
+		player = self.player
+		target = player.find_nearest_enemy()
+		if target:
+			angle = get_angle(player.rect.center, target.rect.center)
+
+			Projectile.spawn(self.world, player.rect.centerx, player.rect.centery, angle, damage,
+			                 self.__class__.__name__, color=(0, 0, 255)).add_to_group()
+
+
+class Sword(Weapon):
+	def __init__(self, player, level=1):
+		self.name = "Sword"
+		super().__init__(player, level)
+		self.damage, self.range = 20 + (level - 1) * 5, 50 + (level - 1) * 10
+
+	def update(self):
+		world = self.world
+		self_range = self.range
+		if self.level >= 3:
+			self_range += 10
+		for enemy in world.enemy_grid.within(self.player.rect.center, self_range):
+			world.damage_events.add(enemy, self.damage, self.__class__.__name__)
+
+	def fire(self):
+		pass
+
+	def super_fire(self):
+		self.damage += 10
+
+
+class Drone(Weapon):
+	def __init__(self, player, level=1):
+		self.name = "Drone"
+		super().__init__(player, level)
+		self.orbit_radius = 100 + (level - 1) * 20
+		self.angle = 0
+		self.speed = 0.05
+		self.damage = 5 + (level - 1) * 2
+		self.super_drone = False
+		# Persistent drone sprites, one per level up to max_drones, spread evenly around the orbit
+		self.max_drones = 6
+		self.sprites, self.built = [], None
+
+	def update(self):
+		if self.level >= 3 and not self.super_drone:
+			self.super_drone = True
+			self.damage += 5
+
+		if self.built != (self.level, self.super_drone):
+			self.build_drones()
+		self.angle += self.speed
+		cx, cy = self.player.rect.center
+		spacing = 2 * math.pi / len(self.sprites)
+		for i, drone_sprite in enumerate(self.sprites):
+			angle = self.angle + i * spacing
+			drone_sprite.rect.center = (cx + self.orbit_radius * math.cos(angle),
+			                            cy + self.orbit_radius * math.sin(angle))
+			drone_sprite.damage = self.damage
+
+	def build_drones(self):
+		for drone_sprite in self.sprites:
+			drone_sprite.kill()
+		self.sprites = [DroneSprite(self.world, *self.player.rect.center, self.damage, "Drone",
+		                            super_drone=self.super_drone) for _ in range(min(self.level, self.max_drones))]
+		for drone_sprite in self.sprites:
+			drone_sprite.add_to_group()
+		self.built = (self.level, self.super_drone)
+
+	def super_fire(self):
+		self.damage += 5
+
+
+class SuperPistol(Pistol):
+	def __init__(self, player, level=3):
+		super().__init__(player, level)
+		self.damage = 20
+		self.shoot_delay = max(400 - (level - 3) * 50, 200)
+		self.schedule()
+		self.name = "Super Pistol"
+
+	def fire(self):
+		player = self.player
+		target = player.find_nearest_enemy()
+		if target:
+			angle = get_angle(player.rect.center, target.rect.center)
+
+			for offset in [-0.05, 0.05]:
+				bullet = Projectile.spawn(
+					self.world,
+					player.rect.centerx,
+					player.rect.centery,
+					angle + offset,
+					self.damage,
+					self.name,
+					color=(255, 215, 0)
+				)
+				bullet.add_to_group()
+
+
+class SuperShotgun(Shotgun):
+	def __init__(self, player, level=3):
+		super().__init__(player, level)
+		self.pellets = 10
+		self.shoot_delay = max(1200 - (level - 3) * 100, 600)
+		self.schedule()
+		self.name = "Super Shotgun"
+
+	def fire(self):
+		player = self.player
+		target = player.find_nearest_enemy()
+		if target:
+			center = get_angle(player.rect.center, target.rect.center)
+			for _ in range(self.pellets):
+				angle = center + self.world.rng.uniform(-math.pi / 12, math.pi / 12)
+				bullet = Projectile.spawn(
+					self.world,
+					player.rect.centerx,
+					player.rect.centery,
+					angle,
+					self.damage,
+					self.name,
+					color=(139, 69, 19)
+				)
+				bullet.add_to_group()
+
+
+# Projectile classes
+class Projectile(pygame.sprite.Sprite):
+	# Movement and bounds culling are batched in world.projectile_store, update() only resolves hits
+	homing, always_update = False, False
+
+	def __init__(self, *args, **kwargs):
+		super().__init__()
+		self.setup(*args, **kwargs)
+
+	@classmethod
+	def spawn(cls, world, *args, **kwargs):
+		# Reused instances go back to world.pools once the store recycles their slot
+		return world.pools.acquire(cls, world, *args, **kwargs)
+
+	def setup(self, world, x, y, angle, damage, weapon, color=(255, 255, 0), speed=10, pierce=False):
+		self.world = world
+		self.image = assets.image('rect', (10, 10), color)
+		self.slot = world.projectile_store.add(self, x, y, angle, speed, damage, weapon, pierce, self.image.get_size())
+
+	@property
+	def rect(self):
+		if self.slot is None:
+			return self.final_rect
+		store = self.world.projectile_store
+		return self.image.get_rect(center=(round(float(store.x[self.slot])), round(float(store.y[self.slot]))))
+
+	@property
+	def angle(self):
+		return float(self.world.projectile_store.angle[self.slot])
+
+	@angle.setter
+	def angle(self, value):
+		self.world.projectile_store.set_angle(self.slot, value)
+
+	@property
+	def speed(self):
+		return float(self.world.projectile_store.speed[self.slot])
+
+	@property
+	def damage(self):
+		return self.world.projectile_store.damage[self.slot].item()
+
+	@property
+	def pierce(self):
+		return bool(self.world.projectile_store.pierce[self.slot])
+
+	@property
+	def weapon(self):
+		store = self.world.projectile_store
+		return store.weapon_names[store.weapon[self.slot]]
+
+	def kill(self):
+		if self.slot is not None:
+			self.world.projectile_store.remove(self.slot)
+		super().kill()
+
+	def update(self):
+		self.hit_enemies()
+
+	def hit_enemies(self):
+		world = self.world
+		hits = world.enemy_grid.query_rect(self.rect)
+		if not hits:
+			return
+		damage, weapon, pierce = self.damage, self.weapon, self.pierce
+		for enemy in hits:
+			world.damage_events.add(enemy, damage, weapon)
+			if not pierce:
+				self.kill()
+				break
+
+	def add_to_group(self):
+		self.world.projectiles.add(self)
+
+
+class SniperBullet(Projectile):
+	def setup(self, world, x, y, angle, damage, weapon, color=(0, 255, 0), speed=30):
+		super().setup(world, x, y, angle, damage, weapon, color, speed, pierce=True)
+		self.max_trace_length = 50
+		if getattr(self, 'trace', None) is None:
+			self.trace = Trail(self.max_trace_length)
+		else:
+			self.trace.clear()
+
+	def update(self):
+		super().update()
+
+
+class SuperSniperBullet(Projectile):
+	homing, always_update = True, True
+
+	def setup(self, world, x, y, angle, damage, weapon, color=(0, 255, 0), speed=30):
+		super().setup(world, x, y, angle, damage, weapon, color, speed, pierce=True)
+		self.max_trace_length = 15
+		if getattr(self, 'trace', None) is None:
+			self.trace = Trail(self.max_trace_length)
+		else:
+			self.trace.clear()
+
+	def find_nearest_enemy(self):
+		return self.world.enemy_grid.nearest(self.rect.center)
+
+	def steer(self):
+		target = self.find_nearest_enemy()
+
+		if target:
+			desired_angle = get_angle(self.rect.center, target.rect.center)
+			angle_difference = desired_angle - self.angle
+
+			angle_difference = (angle_difference + math.pi) % (2 * math.pi) - math.pi
+			max_turn_rate = 0.3
+			if angle_difference > max_turn_rate:
+				angle_change = max_turn_rate
+			elif angle_difference < -max_turn_rate:
+				angle_change = -max_turn_rate
+			else:
+				angle_change = angle_difference
+			self.angle += angle_change
+
+	def update(self):
+		self.trace.append(self.rect.center)
+
+		self.hit_enemies()
+
+
+# Add trace effect or change trajectory if super
+# For simplicity, omitted
+
+
+class HomingRocket(Projectile):
+	homing = True
+
+	def setup(self, world, x, y, angle, damage, weapon, color=(255, 165, 0), speed=7):
+		super().setup(world, x, y, angle, damage, weapon, color, speed)
+		self.target = world.player.find_nearest_enemy()
+		self.explosion_radius = 50
+
+	def steer(self):
+		if self.target and self.target.alive():
+			self.angle = get_angle(self.rect.center, self.target.rect.center)
+
+	def update(self):
+		super().update()
+		rect = self.rect
+		hits = self.world.enemy_grid.query_rect(rect)
+		if hits:
+			Explosion.spawn(self.world, rect.centerx, rect.centery, self.explosion_radius, self.damage,
+			                self.weapon).add_to_group()
+			self.kill()
+
+
+no_serials = np.zeros(0, np.int64)
+
+
+class Explosion(Pooled, pygame.sprite.Sprite):
+	def __init__(self, *args, **kwargs):
+		super().__init__()
+		self.setup(*args, **kwargs)
+
+	def setup(self, world, x, y, radius, damage, weapon, tick_ms=0, hit_once=True, lifetime=500):
+		# Hits every enemy overlapping the circle each tick_ms (every step at 0), each one at most once per
+		# explosion unless hit_once is off
+		self.world = world
+		self.image = assets.image('circle', (radius * 2, radius * 2), (255, 0, 0, 128))
+		self.radius, self.damage, self.weapon = radius, damage, weapon
+		self.rect = self.image.get_rect(center=(x, y))
+		self.timer = self.next_tick = world.ticks()
+		self.tick_ms, self.hit_once, self.lifetime = tick_ms, hit_once, lifetime
+		# Serials of the enemies already hit
+		self.hit = no_serials
+		world.scheduler.at(self.timer + lifetime, self.kill)
+
+	def update(self):
+		world = self.world
+		now = world.ticks()
+		if now < self.next_tick:
+			return
+		self.next_tick = now + self.tick_ms
+		store = world.enemy_store
+		slots = store.circle_query(*self.rect.center, self.radius)
+		if self.hit_once and slots.size:
+			serials = store.serial[slots]
+			if self.hit.size:
+				new = ~np.isin(serials, self.hit)
+				slots, serials = slots[new], serials[new]
+			self.hit = np.concatenate((self.hit, serials))
+		if slots.size:
+			world.damage_events.add_slots(slots, self.damage, self.weapon)
+
+	def add_to_group(self):
+		self.world.explosions.add(self)
+
+
+class DroneSprite(pygame.sprite.Sprite):
+	def __init__(self, world, x, y, damage, weapon, super_drone=False, hit_cooldown=200):
+		super().__init__()
+		self.world = world
+		size = 20 if not super_drone else 30
+		color = (0, 255, 255) if not super_drone else (255, 0, 255)
+		self.image = assets.image('circle', (size, size), color)
+		self.rect = self.image.get_rect(center=(x, y))
+		self.damage = damage
+		self.weapon = weapon
+		# Each enemy is hit at most once per hit_cooldown ms by this drone
+		self.hit_cooldown, self.last_hit = hit_cooldown, {}
+
+	def update(self):
+		world = self.world
+		now, last_hit = world.ticks(), self.last_hit
+		if len(last_hit) > 32:
+			self.last_hit = last_hit = {e: t for e, t in last_hit.items() if now - t < self.hit_cooldown}
+		hits = world.enemy_grid.query_rect(self.rect)
+		for enemy in hits:
+			if enemy in last_hit and now - last_hit[enemy] < self.hit_cooldown:
+				continue
+			last_hit[enemy] = now
+			world.damage_events.add(enemy, self.damage, self.weapon)
+
+	def add_to_group(self):
+		self.world.drones.add(self)
+
+
+class BossProjectile(Pooled, pygame.sprite.Sprite):
+	def __init__(self, *args):
+		super().__init__()
+		self.setup(*args)
+
+	def setup(self, world, x, y, angle, text=None):
+		self.world = world
+		if text:
+			self.image = assets.image('label', 20, ((255, 255, 255), (0, 0, 0)), text)
+		else:
+			self.image = assets.image('rect', (15, 15), (150, 0, 150))
+		self.rect = self.image.get_rect(center=(x, y))
+		self.angle, self.speed = angle, 3
+
+	def update(self):
+		player = self.world.player
+		self.rect.x += math.cos(self.angle) * self.speed
+		self.rect.y += math.sin(self.angle) * self.speed
+		if not SCREEN_RECT.collidepoint(self.rect.center):
+			self.kill()
+		if self.rect.colliderect(player.rect):
+			player.health -= 15
+			self.kill()
+			if player.health <= 0:
+				self.world.game_over = True
+
+	def add_to_group(self):
+		self.world.boss_projectiles_group.add(self)
+
+
+class BabulerProjectile(BossProjectile):
+	def setup(self, world, x, y, target_pos, text):
+		angle = get_angle((x, y), target_pos)
+		super().setup(world, x, y, angle, text)
+
+	def update(self):
+		super().update()
+
+
+# Enemy classes
+class StoredEnemy(pygame.sprite.Sprite):
+	# Position, speed and health live in world.enemy_store, the sprite keeps rect and image for rendering
+	slot = None
+
+	@property
+	def health(self):
+		return float(self.world.enemy_store.health[self.slot]) if self.slot is not None else self.final_health
+
+	@health.setter
+	def health(self, value):
+		self.world.enemy_store.health[self.slot] = value
+
+	def kill(self):
+		if self.slot is not None:
+			self.world.enemy_store.remove(self.slot)
+		super().kill()
+
+
+class Enemy(StoredEnemy):
+	size, color = (40, 40), (200, 0, 0)
+
+	def __init__(self, world, health):
+		super().__init__()
+		self.world = world
+		self.image = assets.image('circle', self.size, self.color)
+		self.rect = self.image.get_rect()
+		edge = self.world.rng.choice(['top', 'bottom', 'left', 'right'])
+		if edge == 'top':
+			self.rect.centerx, self.rect.y = self.world.rng.randint(0, WIDTH), 0
+		elif edge == 'bottom':
+			self.rect.centerx, self.rect.y = self.world.rng.randint(0, WIDTH), HEIGHT
+		elif edge == 'left':
+			self.rect.x, self.rect.centery = 0, self.world.rng.randint(0, HEIGHT)
+		else:
+			self.rect.x, self.rect.centery = WIDTH, self.world.rng.randint(0, HEIGHT)
+		self.speed = 2
+		self.slot = world.enemy_store.add(self, EnemyStore.ENEMY, self.speed, health, 10, 20)
+
+
+# Stands in for several spawns once the enemy budget is reached, with their combined health, contact damage
+# and exp
+class Swarm(Enemy):
+	size, color = (56, 56), (140, 0, 0)
+
+	def __init__(self, world, health):
+		super().__init__(world, health)
+		self.members = 1
+
+	def join(self, health, contact_damage=10, exp=20):
+		store, slot = self.world.enemy_store, self.slot
+		store.health[slot] += health
+		store.contact_damage[slot] += contact_damage
+		store.exp[slot] += exp
+		self.members += 1
+
+	def absorb(self, enemy):
+		# Takes over a regular enemy's place along with its stats, the enemy is removed
+		store, slot = self.world.enemy_store, enemy.slot
+		self.rect.center = enemy.rect.center
+		store.x[self.slot], store.y[self.slot] = enemy.rect.center
+		self.join(store.health[slot], store.contact_damage[slot], store.exp[slot])
+		enemy.kill()
+
+
+class BossEnemy(StoredEnemy):
+	def __init__(self, world, health):
+		super().__init__()
+		self.world = world
+		self.image = assets.image('circle', (60, 60), (255, 100, 100))
+		self.rect = self.image.get_rect()
+		edge = self.world.rng.choice(['top', 'bottom', 'left', 'right'])
+		if edge == 'top':
+			self.rect.centerx, self.rect.y = self.world.rng.randint(0, WIDTH), 0
+		elif edge == 'bottom':
+			self.rect.centerx, self.rect.y = self.world.rng.randint(0, WIDTH), HEIGHT
+		elif edge == 'left':
+			self.rect.x, self.rect.centery = 0, self.world.rng.randint(0, HEIGHT)
+		else:
+			self.rect.x, self.rect.centery = WIDTH, self.world.rng.randint(0, HEIGHT)
+		self.speed, self.max_health = 1.5, health
+		self.slot = world.enemy_store.add(self, EnemyStore.BOSS, self.speed, health, 20, 200)
+		self.last_shot, self.shoot_delay = world.ticks(), 2000
+		self.name = "Boss"
+		self.schedule()
+
+	def schedule(self):
+		# Movement and contact damage are done by world.enemy_store, shots are woken by world.scheduler
+		self.wake = self.world.scheduler.at(self.last_shot + self.shoot_delay, self.fire)
+
+	def fire(self):
+		if not self.alive():
+			return
+		self.last_shot = self.world.ticks()
+		self.schedule()
+		angle = get_angle(self.rect.center, self.world.player.rect.center)
+		BossProjectile.spawn(self.world, self.rect.centerx, self.rect.centery, angle).add_to_group()
+
+
+class BabulerBoss(BossEnemy):
+	def __init__(self, world, health):
+		super().__init__(world, health * 10)
+		self.name = "babuler"
+		self.image = assets.image('rect', (60, 60), (100, 100, 255))
+		self.shoot_delay = 1500
+		Scheduler.cancel(self.wake)
+		self.schedule()
+
+	def shoot(self, player_pos):
+		phrase = self.world.rng.choice(babuler_phrases)
+		BabulerProjectile.spawn(self.world, self.rect.centerx, self.rect.centery, player_pos, phrase).add_to_group()
+
+
+# Collectibles
+class BananaCollectible(pygame.sprite.Sprite):
+	def __init__(self, world):
+		super().__init__()
+		self.world = world
+		self.image = assets.image('ellipse', (20, 40), (255, 255, 0))
+		rng = world.rng
+		self.rect = self.image.get_rect(center=(rng.randint(50, WIDTH - 50), rng.randint(50, HEIGHT - 50)))
+
+	def update(self):
+		pass
+
+
+class HealthPack(pygame.sprite.Sprite):
+	def __init__(self, world):
+		super().__init__()
+		self.world = world
+		self.image = assets.image('label', 18, ((255, 255, 255), (0, 255, 0)), 'hp')
+		rng = world.rng
+		self.rect = self.image.get_rect(center=(rng.randint(50, WIDTH - 50), rng.randint(50, HEIGHT - 50)))
+
+	def update(self):
+		player = self.world.player
+		if self.rect.colliderect(player.rect):
+			player.health = clamp(player.health + 30, 0, player.max_health)
+			self.kill()
+
+
+# Explosion effect
+class ExplosionEffect(Pooled, pygame.sprite.Sprite):
+	def __init__(self, *args):
+		super().__init__()
+		self.image = assets.image('circle', (50, 50), (255, 165, 0))
+		self.setup(*args)
+
+	def setup(self, world, x, y):
+		self.world = world
+		self.rect = self.image.get_rect(center=(x, y))
+		self.timer = world.ticks()
+		world.scheduler.at(self.timer + 500, self.kill)
+
+
+# Simulation clock, advances a fixed amount per tick instead of reading wall time
+class SimClock:
+	def __init__(self, tick_ms=TICK_MS):
+		self.tick_ms, self.frame, self.now = tick_ms, 0, 0
+
+	def tick(self):
+		self.frame += 1
+		self.now = self.frame * self.tick_ms
+		return self.now
+
+	def reset(self):
+		self.frame, self.now = 0, 0
+
+
+# World holds the whole simulation state; game.py only renders it
+class World:
+	weapon_classes = {"Pistol": Pistol, "Shotgun": Shotgun, "SniperRifle": SniperRifle,
+	                  "RocketLauncher": RocketLauncher, "Rifle": Rifle, "MachineGun": MachineGun, "Sword": Sword,
+	                  "Drone": Drone}
+	# Attribute names of the groups(), in the same order
+	group_names = ('enemy_list', 'boss_list', 'projectiles', 'boss_projectiles_group', 'explosions', 'drones',
+	               'collectibles', 'healthpacks')
+
+	def __init__(self, difficulty='Normal', seed=None, tick_ms=TICK_MS):
+		self.clock = SimClock(tick_ms)
+		# Groups
+		self.enemy_list, self.boss_list = pygame.sprite.Group(), pygame.sprite.Group()
+		self.enemy_store = EnemyStore()
+		self.projectiles = pygame.sprite.Group()
+		self.projectile_store = ProjectileStore((WIDTH, HEIGHT))
+		# Reusable projectiles, boss projectiles and explosions
+		self.pools = Pools()
+		self.projectile_store.on_recycle = self.pools.release
+		self.boss_projectiles_group = pygame.sprite.Group()
+		self.explosions = pygame.sprite.Group()
+		self.drones = pygame.sprite.Group()
+		self.collectibles = pygame.sprite.Group()
+		self.healthpacks = pygame.sprite.Group()
+		# Broad-phase and nearest-enemy index for everything that targets or damages enemies,
+		# rebuilt once enemies have moved and kept current as new ones spawn
+		self.enemy_grid = SpatialHash()
+		# Weapon shots, boss shots and effect lifetimes, woken when due instead of polled every step
+		self.scheduler = Scheduler()
+		self.enemy_budget, self.swarm_size = enemy_budget, swarm_size
+		self.swarms = pygame.sprite.Group()
+		self.damage_stats = {}
+		# Hits are buffered here during a step and applied together before the end-of-step cull
+		self.damage_events = DamageEvents()
+		# Level up choice, headless runs take the first offered weapon. With None, offers wait in
+		# pending_choices until choose() answers them
+		self.choose_weapon = lambda choices: choices[0]
+		self.pending_choices = deque()
+		# Per-phase timing hooks, a FrameTimer when something is measuring
+		self.timer = null_timer
+		self.set_difficulty(difficulty)
+		self.reset(seed)
+
+	def ticks(self):
+		return self.clock.now
+
+	def set_difficulty(self, difficulty):
+		self.difficulty = difficulty
+		self.initial_enemy_health, self.spawn_interval = difficulty_settings[difficulty]
+
+	def reset(self, seed=None):
+		# One RNG stream per run, a run without a seed still records the one it got
+		self.seed = seed if seed is not None else random.randrange(2 ** 32)
+		self.rng = random.Random(self.seed)
+		self.clock.reset()
+		self.score, self.game_over, self.elapsed_time = 0, False, 0
+		for group in self.groups():
+			group.empty()
+		self.enemy_store.clear()
+		self.projectile_store.clear()
+		self.scheduler.clear()
+		self.pools.clear()
+		self.enemy_grid.clear()
+		self.damage_stats.clear()
+		self.damage_events.clear()
+		self.pending_choices.clear()
+		self.swarms.empty()
+		# First enemy spawns right away, first boss after 30 sec
+		self.spawn_timer, self.boss_spawn_timer = -self.spawn_interval, 0
+		self.player = Player(self)
+		self.game_start_time = self.ticks()
+
+	def groups(self):
+		return (self.enemy_list, self.boss_list, self.projectiles, self.boss_projectiles_group, self.explosions,
+		        self.drones, self.collectibles, self.healthpacks)
+
+	def add_weapon(self, name):
+		player = self.player
+		if name in player.weapons:
+			player.weapons[name].upgrade()
+		else:
+			player.weapons[name] = self.weapon_classes[name](player)
+
+	def level_up(self):
+		choices = self.rng.sample(weapon_names, 3)
+		self.pending_choices.append(choices)
+		if self.choose_weapon:
+			self.choose(self.choose_weapon(choices))
+
+	def choose(self, name):
+		# Answers the oldest pending level up, a name that wasn't offered leaves it pending
+		choices = self.pending_choices[0]
+		if name not in choices:
+			raise ValueError(f'{name} was not offered, choices were {choices}')
+		self.pending_choices.popleft()
+		self.add_weapon(name)
+
+	def fold_spawn(self, health):
+		# At the enemy budget a spawn joins the smallest swarm. Once every swarm has swarm_size members, the
+		# oldest regular enemy is merged with the spawn into a new swarm in its place, so the count never grows
+		swarm = min(self.swarms, key=lambda s: s.members, default=None)
+		if swarm is None or swarm.members >= self.swarm_size:
+			enemy = next((e for e in self.enemy_list if not isinstance(e, Swarm)), None)
+			if enemy is not None or swarm is None:
+				swarm = Swarm(self, health)
+				if enemy is not None:
+					swarm.absorb(enemy)
+				self.spawn_enemy(swarm)
+				self.swarms.add(swarm)
+				return
+		swarm.join(health)
+
+	def spawn_enemy(self, enemy):
+		(self.enemy_list if isinstance(enemy, Enemy) else self.boss_list).add(enemy)
+		self.enemy_grid.insert(enemy)
+
+	def step(self, keys):
+		player = self.player
+		lap = self.timer.lap
+		now = self.clock.tick()
+		self.elapsed_time = int(now - self.game_start_time) // 1000
+		player.update(keys)
+		lap('player')
+		self.scheduler.run(now)
+		lap('scheduler')
+		self.enemy_store.step(self)
+		lap('enemy_list')
+		self.enemy_grid.rebuild(self.enemy_list, self.boss_list)
+		lap('enemy_grid')
+		self.projectile_store.step(self)
+		lap('projectiles')
+		self.boss_projectiles_group.update()
+		lap('boss_projectiles_group')
+		self.explosions.update()
+		lap('explosions')
+		self.drones.update()
+		lap('drones')
+		self.collectibles.update()
+		lap('collectibles')
+		self.healthpacks.update()
+		lap('healthpacks')
+		# Spawn enemies
+		if now - self.spawn_timer > self.spawn_interval - (15 * self.elapsed_time):
+			self.spawn_timer = now
+			health = self.initial_enemy_health + (self.elapsed_time ** 1.1)
+			if len(self.enemy_list) < self.enemy_budget:
+				self.spawn_enemy(Enemy(self, health))
+			else:
+				self.fold_spawn(health)
+		# Spawn bosses every 30 sec
+		if now - self.boss_spawn_timer > 30000 and not self.boss_list:
+			self.boss_spawn_timer = now
+			boss = BabulerBoss(self, 5) if self.rng.choice([True, False]) else BossEnemy(self, 50)
+			self.spawn_enemy(boss)
+		# Spawn collectibles
+		if self.rng.randint(0, 500) < 5: self.collectibles.add(BananaCollectible(self))
+		# Spawn health packs
+		if self.rng.randint(0, 1000) < 3: self.healthpacks.add(HealthPack(self))
+		lap('spawning')
+		# Check collectibles
+		for banana in self.collectibles:
+			if player.rect.colliderect(banana.rect):
+				player.add_exp(10)
+				banana.kill()
+		# Check health packs
+		for pack in self.healthpacks:
+			if player.rect.colliderect(pack.rect):
+				pack.update()
+		# Collision handled in projectile classes
+		# Spawn bonuses after boss defeat
+		for boss in self.boss_list:
+			if not boss.alive():
+				bonuses = 3 if isinstance(boss, BabulerBoss) else 1
+				for _ in range(bonuses):
+					HealthPack(self).add()
+		lap('pickups')
+		self.damage_events.resolve(self)
+		lap('damage')
+		self.enemy_store.cull()
+		self.projectile_store.recycle()
+		lap('cull')
+
+
+# Headless run: no window, no frame cap, no drawing
+no_keys = {k: False for k in (pygame.K_LEFT, pygame.K_a, pygame.K_RIGHT, pygame.K_d, pygame.K_UP, pygame.K_w,
+                              pygame.K_DOWN, pygame.K_s)}
+
+
+def run_headless(frames, difficulty='Normal', keys=no_keys, world=None, seed=None):
+	world = world or World(difficulty, seed)
+	frame = 0
+	while frame < frames and not world.game_over:
+		world.step(keys)
+		frame += 1
+	return world, frame
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Run the Boss Survivor simulation without a display")
+	parser.add_argument('--frames', type=int, default=10000)
+	parser.add_argument('--difficulty', choices=list(difficulty_settings), default='Normal')
+	parser.add_argument('--seed', type=int)
+	parser.add_argument('--enemy-budget', type=int, default=enemy_budget,
+	                    help='live enemies before new spawns are folded into swarms')
+	parser.add_argument('--swarm-size', type=int, default=swarm_size,
+	                    help='spawns per swarm before regular enemies are merged into new ones')
+	parser.add_argument('--damage-log', metavar='PATH', help='write every damage event to a CSV file')
+	args = parser.parse_args()
+	world = World(args.difficulty, args.seed)
+	world.enemy_budget, world.swarm_size = args.enemy_budget, args.swarm_size
+	log = None
+	if args.damage_log:
+		log = open(args.damage_log, 'w', newline='')
+		writer = csv.writer(log)
+		writer.writerow(('tick', 'slot', 'kind', 'weapon', 'amount', 'killed'))
+		names = world.damage_events.weapon_names
+		world.damage_events.subscribers.append(lambda world, events: writer.writerows(
+			(tick, slot, kind, names[weapon], amount, int(killed)) for tick, slot, kind, weapon, amount, killed in
+			events.tolist()))
+	start = time.perf_counter()
+	world, frames = run_headless(args.frames, world=world)
+	duration = time.perf_counter() - start
+	if log:
+		log.close()
+	print(f'{frames} frames in {duration:.2f}s ({frames / max(duration, 1e-9):.0f} fps)')
+	print(f'seed: {world.seed} sim time: {world.elapsed_time}s')
+	print(f'LVL: {world.player.level} HP: {world.player.health}/{world.player.max_health} '
+	      f'game over: {world.game_over}')
+	for w, d in world.damage_stats.items():
+		print(f'{w}: {d} dmg')
+	for name, stats in world.pools.stats().items():
+		print(f'pool {name}: {stats["hits"]} hits, {stats["misses"]} misses, {stats["free"]} free')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,164 @@
+import random
+
+import numpy as np
+import pygame
+
+from engine import WIDTH, HEIGHT, TICK_MS, World, weapon_names
+from observation import FeatureMaps
+
+# Actions 0-8 move (none, then clockwise from up), 9-11 pick an offered weapon when a level up is pending
+moves = ((0, 0), (0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1))
+num_actions = len(moves) + 3
+move_keys = [{pygame.K_LEFT: dx < 0, pygame.K_RIGHT: dx > 0, pygame.K_UP: dy < 0, pygame.K_DOWN: dy > 0,
+              pygame.K_a: False, pygame.K_d: False, pygame.K_w: False, pygame.K_s: False} for dx, dy in moves]
+weapon_index = {name: i for i, name in enumerate(weapon_names)}
+# Nearest enemies in the observation, fewer are zero padded
+nearest_enemies = 16
+# Player (x, y, health, level, exp, pending), weapon levels, offered weapons one-hot, then per enemy (dx, dy, health, boss)
+obs_size = 6 + len(weapon_names) + 3 * len(weapon_names) + nearest_enemies * 4
+
+
+def observe(world, out):
+	# Fills out (float32, obs_size) in place
+	player, store = world.player, world.enemy_store
+	px, py = player.rect.center
+	out[:] = 0
+	out[0], out[1] = px / WIDTH, py / HEIGHT
+	out[2] = player.health / player.max_health
+	out[3], out[4] = player.level / 10, player.exp / player.exp_to_lvl
+	out[5] = bool(world.pending_choices)
+	base = 6
+	for name, weapon in player.weapons.items():
+		out[base + weapon_index[name]] = weapon.level / 5
+	base += len(weapon_names)
+	if world.pending_choices:
+		for i, name in enumerate(world.pending_choices[0]):
+			out[base + i * len(weapon_names) + weapon_index[name]] = 1
+	base += 3 * len(weapon_names)
+	idx = store.live_slots()
+	if idx.size:
+		dx, dy = (store.x[idx] - px) / WIDTH, (store.y[idx] - py) / HEIGHT
+		dist = dx * dx + dy * dy
+		if idx.size > nearest_enemies:
+			keep = np.argpartition(dist, nearest_enemies)[:nearest_enemies]
+			idx, dx, dy, dist = idx[keep], dx[keep], dy[keep], dist[keep]
+		order = np.argsort(dist)
+		enemies = out[base:base + len(order) * 4].reshape(-1, 4)
+		enemies[:, 0], enemies[:, 1] = dx[order], dy[order]
+		enemies[:, 2] = store.health[idx[order]] / 1000
+		enemies[:, 3] = store.kind[idx[order]]
+	return out
+
+
+# One game behind reset()/step(), each step runs frame_skip world steps with the action's keys held.
+# Reward is the survived time in seconds plus exp / 100. With feature_cell, info['features'] also carries
+# FeatureMaps at that cell size
+class GameEnv:
+	def __init__(self, difficulty='Normal', frame_skip=4, max_steps=9000, feature_cell=None):
+		self.world = World(difficulty)
+		self.world.choose_weapon = None
+		self.frame_skip, self.max_steps = frame_skip, max_steps
+		self.steps = 0
+		# Seeds of the runs after a seeded reset, so auto-resets replay the same way
+		self.rng = random.Random()
+		self.obs = np.zeros(obs_size, np.float32)
+		self.features = FeatureMaps(feature_cell) if feature_cell else None
+
+	def info(self):
+		return {} if self.features is None else {'features': self.features.update(self.world)}
+
+	def reset(self, seed=None):
+		# A seed plays that run and reseeds the runs after it, without one the next seed comes from self.rng
+		if seed is None:
+			seed = self.rng.randrange(2 ** 32)
+		else:
+			self.rng.seed(seed)
+		self.world.reset(seed)
+		self.steps = 0
+		return observe(self.world, self.obs), {'seed': self.world.seed, **self.info()}
+
+	def step(self, action):
+		# A pending level up is answered first, a move action then takes the first offer. The world does
+		# not advance on that step
+		world, player = self.world, self.world.player
+		self.steps += 1
+		exp = player.total_exp
+		if world.pending_choices:
+			choices = world.pending_choices[0]
+			world.choose(choices[action - len(moves) if action >= len(moves) else 0])
+			reward = 0.0
+		else:
+			keys = move_keys[action if action < len(moves) else 0]
+			frames = 0
+			while frames < self.frame_skip and not world.game_over and not world.pending_choices:
+				world.step(keys)
+				frames += 1
+			reward = frames * TICK_MS / 1000 + (player.total_exp - exp) / 100
+		terminated = world.game_over
+		truncated = not terminated and self.steps >= self.max_steps
+		return observe(world, self.obs), reward, terminated, truncated, self.info()
+
+
+# Many independent games stepped together, observations and rewards come back as (n, ...) arrays.
+# Finished games reset on the spot, their last observation goes to info['final_observation']
+class VectorEnv:
+	def __init__(self, num_envs, difficulty='Normal', frame_skip=4, max_steps=9000, feature_cell=None):
+		self.envs = [GameEnv(difficulty, frame_skip, max_steps, feature_cell) for _ in range(num_envs)]
+		self.obs = np.zeros((num_envs, obs_size), np.float32)
+		self.features = None
+		if feature_cell:
+			self.features = np.zeros((num_envs, *self.envs[0].features.maps.shape), np.float32)
+			for env, maps in zip(self.envs, self.features):
+				env.features.maps = maps
+		self.rewards = np.zeros(num_envs, np.float32)
+		self.terminated = np.zeros(num_envs, bool)
+		self.truncated = np.zeros(num_envs, bool)
+		for env, obs in zip(self.envs, self.obs):
+			env.obs = obs
+
+	def reset(self, seed=None):
+		for i, env in enumerate(self.envs):
+			env.reset(None if seed is None else seed + i)
+		return self.obs, self.info({})
+
+	def step(self, actions):
+		final = {}
+		for i, (env, action) in enumerate(zip(self.envs, np.asarray(actions).tolist())):
+			_, self.rewards[i], self.terminated[i], self.truncated[i], _ = env.step(action)
+			if self.terminated[i] or self.truncated[i]:
+				final[i] = env.obs.copy()
+				env.reset()
+		return self.obs, self.rewards, self.terminated, self.truncated, self.info({'final_observation': final})
+
+	def info(self, info):
+		# Feature maps of reset games are already those of their new run
+		if self.features is not None:
+			info['features'] = self.features
+		return info
+
+
+def main():
+	import argparse
+	import time
+	parser = argparse.ArgumentParser(description="Measure environment throughput with random actions")
+	parser.add_argument('--envs', type=int, default=16)
+	parser.add_argument('--steps', type=int, default=2000)
+	parser.add_argument('--frame-skip', type=int, default=4)
+	parser.add_argument('--feature-cell', type=int, help='also build feature maps at this cell size')
+	args = parser.parse_args()
+	vec = VectorEnv(args.envs, frame_skip=args.frame_skip, feature_cell=args.feature_cell)
+	vec.reset(seed=0)
+	rng = np.random.default_rng(0)
+	start = time.perf_counter()
+	episodes = 0
+	for _ in range(args.steps):
+		_, _, terminated, truncated, _ = vec.step(rng.integers(0, num_actions, args.envs))
+		episodes += int((terminated | truncated).sum())
+	duration = time.perf_counter() - start
+	env_steps = args.steps * args.envs
+	print(f'{env_steps} env steps ({env_steps * args.frame_skip} world steps) in {duration:.2f}s: '
+	      f'{env_steps / duration:.0f} env steps/s, {episodes} episodes finished')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,109 @@
+import cProfile
+import csv
+import json
+import pstats
+import time
+from collections import deque
+
+import pygame
+
+# Timed phases in the order they run, sim phases repeat once per step and add up over a frame
+phases = ('input', 'player', 'scheduler', 'enemy_list', 'enemy_grid', 'projectiles', 'boss_projectiles_group',
+          'explosions', 'drones', 'collectibles', 'healthpacks', 'spawning', 'pickups', 'damage', 'cull', 'draw_clear',
+          'draw_sprites', 'draw_hud', 'draw_overlays', 'display')
+
+
+# Stand-in used when nothing is being measured, every hook is a no-op
+class NullTimer:
+	def lap(self, name):
+		pass
+
+
+null_timer = NullTimer()
+
+
+# Wall time per phase of a frame, entity counts per group, streamed to CSV or JSONL and shown as an overlay
+class FrameTimer:
+	def __init__(self, path=None, window=30):
+		self.times = dict.fromkeys(phases, 0.0)
+		self.last = self.start = time.perf_counter()
+		self.frame = 0
+		self.history = deque(maxlen=window)
+		self.file = self.writer = None
+		if path:
+			self.file = open(path, 'w', newline='')
+			self.jsonl = path.endswith('.jsonl')
+		self.profiler, self.profile_frames = None, 0
+		self.surface = None
+
+	def begin(self):
+		self.times = dict.fromkeys(phases, 0.0)
+		self.last = self.start = time.perf_counter()
+
+	def lap(self, name):
+		# Charges the time since the previous lap to name
+		now = time.perf_counter()
+		self.times[name] += now - self.last
+		self.last = now
+
+	def end(self, world):
+		total = time.perf_counter() - self.start
+		row = {'frame': self.frame, 'tick': world.clock.frame, 'total_ms': round(total * 1000, 3)}
+		row.update((name, round(t * 1000, 3)) for name, t in self.times.items())
+		row.update((f'{name}_count', len(group)) for name, group in zip(world.group_names, world.groups()))
+		self.frame += 1
+		self.history.append(row)
+		if self.file:
+			self.write(row)
+		if self.profiler:
+			self.profile_frames -= 1
+			if self.profile_frames <= 0:
+				self.stop_profile()
+		if self.surface is not None and self.frame % self.history.maxlen == 0:
+			self.surface = None
+		return row
+
+	def write(self, row):
+		if self.jsonl:
+			self.file.write(json.dumps(row) + '\n')
+			return
+		if self.writer is None:
+			self.writer = csv.DictWriter(self.file, list(row))
+			self.writer.writeheader()
+		self.writer.writerow(row)
+
+	def close(self):
+		if self.profiler:
+			self.stop_profile()
+		if self.file:
+			self.file.close()
+			self.file = None
+
+	def start_profile(self, frames=300):
+		# cProfile capture over the next frames, dumped to a .prof file and summarized on stdout when done
+		if self.profiler:
+			return
+		self.profiler, self.profile_frames = cProfile.Profile(), frames
+		self.profiler.enable()
+
+	def stop_profile(self):
+		profiler, self.profiler = self.profiler, None
+		profiler.disable()
+		path = time.strftime('profile-%Y%m%d-%H%M%S.prof')
+		profiler.dump_stats(path)
+		print(f'profile written to {path}')
+		pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
+
+	def overlay(self, font, color=(255, 255, 0)):
+		# Averages over the last window frames, re-composed once per window
+		if self.surface is None and self.history:
+			rows = self.history
+			keys = ('total_ms',) + phases
+			lines = [f'{key}: {sum(row[key] for row in rows) / len(rows):.2f} ms' for key in keys]
+			last = rows[-1]
+			lines += [f'{name}: {last[name]}' for name in last if name not in keys and name not in ('frame', 'tick')]
+			texts = [font.render(line, True, color, (0, 0, 0)) for line in lines]
+			height = font.get_linesize()
+			self.surface = pygame.Surface((max(t.get_width() for t in texts), height * len(texts)))
+			self.surface.blits([(t, (0, i * height)) for i, t in enumerate(texts)], False)
+		return self.surface
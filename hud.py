@@ -0,0 +1,47 @@
+import pygame
+
+import assets
+
+
+# HUD layer, re-composed only when one of the shown values changes
+class Hud:
+	def __init__(self, size, font, color=(255, 255, 255)):
+		self.width, self.height = size
+		self.font, self.color = font, color
+		self.surface = pygame.Surface(size, pygame.SRCALPHA)
+		self.values = None
+		self.rects = []
+
+	def update(self, world):
+		# Returns the screen areas that changed, old and new text rects, or [] when nothing did
+		player = world.player
+		values = (world.elapsed_time, player.health, player.max_health, player.level, player.exp, player.exp_to_lvl,
+		          world.difficulty, tuple((w, weapon.level) for w, weapon in player.weapons.items()))
+		if values == self.values:
+			return []
+		self.values = values
+		old = self.rects
+		self.compose(*values)
+		return old + self.rects
+
+	def draw(self, screen, world):
+		self.update(world)
+		screen.blit(self.surface, (0, 0))
+
+	def blit(self, surface, pos):
+		self.rects.append(self.surface.blit(surface, pos))
+
+	def compose(self, elapsed_time, health, max_health, level, exp, exp_to_lvl, difficulty, weapons):
+		font, color = self.font, self.color
+		self.surface.fill((0, 0, 0, 0))
+		self.rects = []
+		# Timer
+		self.blit(assets.text(font, f'Time: {elapsed_time}s', color), (self.width // 2 - 30, 10))
+		# Player stats
+		self.blit(assets.text(font, f'HP: {health}/{max_health}', color), (10, 10))
+		self.blit(assets.text(font, f'LVL: {level}', color), (10, 30))
+		self.blit(assets.text(font, f'EXP: {exp}/{exp_to_lvl}', color), (10, 50))
+		self.blit(assets.text(font, f'DIFF: {difficulty}', color), (10, 70))
+		# Weapons
+		for i, (w, weapon_level) in enumerate(weapons):
+			self.blit(assets.text(font, f'{w} Lvl {weapon_level}', color), (self.width - 150, self.height - 20 - i * 20))
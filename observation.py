@@ -0,0 +1,99 @@
+import numpy as np
+import pygame
+
+from engine import WIDTH, HEIGHT
+from enemy_store import EnemyStore
+from render import background_color, frame_blits
+
+# Channels of FeatureMaps, each a count per cell
+feature_channels = ('player', 'enemies', 'bosses', 'projectiles', 'boss_projectiles', 'pickups')
+
+
+# Offscreen render target backed by a NumPy array, pixels is an (HEIGHT, WIDTH, 3) uint8 view of it that
+# every render() draws into, so reading a frame never copies it back out of the surface
+class PixelView:
+	def __init__(self, size=(WIDTH, HEIGHT)):
+		width, height = size
+		self.buffer = np.zeros((height, width, 4), np.uint8)
+		# A surface made from a buffer shares its memory and is never locked, so blits land in self.buffer.
+		# BGRA matches the loaded sprites' pixel format and keeps blits on SDL's fast path
+		self.surface = pygame.image.frombuffer(self.buffer, size, 'BGRA')
+		self.pixels = self.buffer[:, :, 2::-1]
+
+	def render(self, world, previous=None, alpha=1.0):
+		self.surface.fill(background_color)
+		self.surface.blits(frame_blits(world, previous, alpha), False)
+		return self.pixels
+
+
+# Entity positions rasterized straight into low resolution count maps, no drawing involved.
+# maps is a (channels, rows, cols) float32 array refilled in place by update()
+class FeatureMaps:
+	def __init__(self, cell=16, size=(WIDTH, HEIGHT)):
+		self.cell = cell
+		self.cols, self.rows = -(-size[0] // cell), -(-size[1] // cell)
+		self.maps = np.zeros((len(feature_channels), self.rows, self.cols), np.float32)
+
+	def update(self, world):
+		# Every entity's cell index offset by its channel's plane, counted in a single bincount
+		store, projectiles = world.enemy_store, world.projectile_store
+		xs, ys, channels = [], [], []
+
+		def add(channel, x, y):
+			xs.append(x)
+			ys.append(y)
+			channels.append(np.full(len(x), channel, np.intp))
+
+		def add_sprites(channel, *groups):
+			centers = [sprite.rect.center for group in groups for sprite in group]
+			if centers:
+				add(channel, *np.array(centers, float).T)
+
+		add(0, *np.array([world.player.rect.center], float).T)
+		idx = store.live_slots()
+		boss = store.kind[idx] == EnemyStore.BOSS
+		add(1, store.x[idx[~boss]], store.y[idx[~boss]])
+		add(2, store.x[idx[boss]], store.y[idx[boss]])
+		idx = projectiles.live_slots()
+		add(3, projectiles.x[idx], projectiles.y[idx])
+		add_sprites(4, world.boss_projectiles_group)
+		add_sprites(5, world.collectibles, world.healthpacks)
+		rows, cols, cell = self.rows, self.cols, self.cell
+		col = np.clip(np.concatenate(xs) // cell, 0, cols - 1).astype(np.intp)
+		row = np.clip(np.concatenate(ys) // cell, 0, rows - 1).astype(np.intp)
+		cells = (np.concatenate(channels) * rows + row) * cols + col
+		self.maps.reshape(-1)[:] = np.bincount(cells, minlength=self.maps.size)
+		return self.maps
+
+
+def main():
+	import argparse
+	import time
+	from engine import World, no_keys
+	parser = argparse.ArgumentParser(description="Time pixel and feature map observations on a headless run")
+	parser.add_argument('--frames', type=int, default=3000)
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--cell', type=int, default=16)
+	args = parser.parse_args()
+	world = World('Normal', args.seed)
+	view, features = PixelView(), FeatureMaps(args.cell)
+	timings = {'step': 0.0, 'pixels': 0.0, 'features': 0.0}
+	for _ in range(args.frames):
+		if world.game_over:
+			world.reset()
+		start = time.perf_counter()
+		world.step(no_keys)
+		after_step = time.perf_counter()
+		view.render(world)
+		after_pixels = time.perf_counter()
+		features.update(world)
+		timings['step'] += after_step - start
+		timings['pixels'] += after_pixels - after_step
+		timings['features'] += time.perf_counter() - after_pixels
+	for name, total in timings.items():
+		print(f'{name:<9} {total / args.frames * 1000:.3f} ms/frame ({args.frames / max(total, 1e-9):.0f}/s)')
+	print(f'pixels {view.pixels.shape}, feature maps {features.maps.shape}')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,43 @@
+# Free lists of reusable sprites keyed by class, with hit/miss counters for sizing
+class Pools:
+	def __init__(self, max_free=4096):
+		self.max_free = max_free
+		self.free, self.hits, self.misses = {}, {}, {}
+
+	def acquire(self, cls, *args, **kwargs):
+		free = self.free.get(cls)
+		if free:
+			self.hits[cls] = self.hits.get(cls, 0) + 1
+			obj = free.pop()
+			obj.setup(*args, **kwargs)
+			return obj
+		self.misses[cls] = self.misses.get(cls, 0) + 1
+		return cls(*args, **kwargs)
+
+	def release(self, obj):
+		free = self.free.setdefault(type(obj), [])
+		if len(free) < self.max_free:
+			free.append(obj)
+
+	def clear(self):
+		# A new run starts with empty free lists and counters
+		self.free.clear()
+		self.hits.clear()
+		self.misses.clear()
+
+	def stats(self):
+		classes = set(self.hits) | set(self.misses) | set(self.free)
+		return {cls.__name__: {'hits': self.hits.get(cls, 0), 'misses': self.misses.get(cls, 0),
+		                       'free': len(self.free.get(cls, ()))} for cls in classes}
+
+
+# Mixed into pooled sprites, killing one hands it back to world.pools
+class Pooled:
+	@classmethod
+	def spawn(cls, world, *args, **kwargs):
+		return world.pools.acquire(cls, world, *args, **kwargs)
+
+	def kill(self):
+		if self.alive():
+			super().kill()
+			self.world.pools.release(self)
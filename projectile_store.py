@@ -0,0 +1,74 @@
+import math
+
+import numpy as np
+
+from slot_store import SlotStore
+
+
+# Struct-of-arrays projectile state, moved and bounds-culled in one pass per frame
+class ProjectileStore(SlotStore):
+	fields = {'x': float, 'y': float, 'angle': float, 'speed': float, 'vx': float, 'vy': float, 'damage': np.int64,
+	          'w': np.int32, 'h': np.int32, 'weapon': np.int16, 'pierce': bool, 'homing': bool,
+	          'always_update': bool}
+
+	def __init__(self, bounds, capacity=1024):
+		super().__init__(capacity)
+		self.bounds = bounds
+		self.weapon_ids, self.weapon_names = {}, []
+
+	def add(self, sprite, x, y, angle, speed, damage, weapon, pierce, size):
+		slot = self.alloc(sprite)
+		if weapon not in self.weapon_ids:
+			self.weapon_ids[weapon] = len(self.weapon_names)
+			self.weapon_names.append(weapon)
+		self.x[slot], self.y[slot], self.speed[slot], self.damage[slot] = x, y, speed, damage
+		self.w[slot], self.h[slot] = size
+		self.weapon[slot], self.pierce[slot] = self.weapon_ids[weapon], pierce
+		self.homing[slot], self.always_update[slot] = sprite.homing, sprite.always_update
+		self.set_angle(slot, angle)
+		return slot
+
+	def set_angle(self, slot, angle):
+		speed = self.speed[slot]
+		self.angle[slot], self.vx[slot], self.vy[slot] = angle, math.cos(angle) * speed, math.sin(angle) * speed
+
+	def step(self, world):
+		idx = self.live_slots()
+		if not idx.size:
+			return
+		sprites = self.sprites
+		# Homing projectiles pick their new heading before the batched move
+		for slot in idx[self.homing[idx]].tolist():
+			sprites[slot].steer()
+		x, y = self.x[idx] + self.vx[idx], self.y[idx] + self.vy[idx]
+		self.x[idx], self.y[idx] = x, y
+		cx, cy = np.rint(x).astype(int), np.rint(y).astype(int)
+		width, height = self.bounds
+		inside = (cx >= 0) & (cx < width) & (cy >= 0) & (cy < height)
+		for slot in idx[~inside].tolist():
+			sprites[slot].kill()
+		idx, cx, cy = idx[inside], cx[inside], cy[inside]
+		# Only projectiles next to an occupied grid cell need a collision query
+		needs_update = self.near(world.enemy_grid, idx, cx, cy) | self.always_update[idx]
+		for slot in idx[needs_update].tolist():
+			sprites[slot].update()
+
+	def near(self, grid, idx, cx, cy):
+		# Corner cells of each projectile looked up in a dense occupancy map of the grid's extent
+		if grid.bounds is None:
+			return np.zeros(idx.size, bool)
+		size = grid.cell_size
+		min_x, min_y, max_x, max_y = grid.bounds
+		occupied = np.zeros((max_x - min_x + 3, max_y - min_y + 3), bool)
+		keys = np.array(list(grid.cells), int).reshape(-1, 2)
+		occupied[keys[:, 0] - min_x + 1, keys[:, 1] - min_y + 1] = True
+		w, h = self.w[idx], self.h[idx]
+		left, top = cx - w // 2, cy - h // 2
+		x0 = np.clip(left // size - min_x + 1, 0, occupied.shape[0] - 1)
+		x1 = np.clip((left + w - 1) // size - min_x + 1, 0, occupied.shape[0] - 1)
+		y0 = np.clip(top // size - min_y + 1, 0, occupied.shape[1] - 1)
+		y1 = np.clip((top + h - 1) // size - min_y + 1, 0, occupied.shape[1] - 1)
+		return occupied[x0, y0] | occupied[x0, y1] | occupied[x1, y0] | occupied[x1, y1]
+
+	def release(self, sprite, slot):
+		sprite.final_rect = sprite.rect
@@ -0,0 +1,133 @@
+import pygame
+
+from engine import SuperSniperBullet
+from frame_timer import null_timer
+from trail import trail_blits
+
+background_color = (100, 100, 100)
+
+
+def positions(world):
+	# Top-left of every drawn sprite, taken before the last simulation step of a frame
+	found = {world.player: world.player.rect.topleft}
+	for group in world.groups():
+		for sprite in group:
+			found[sprite] = sprite.rect.topleft
+	return found
+
+
+def sprites(world, previous=None, alpha=1.0):
+	# (image, pos) pairs in draw order, player below everything else. With previous positions, sprites are
+	# drawn alpha of the way from where they were to where they are now
+	layers = ((world.player,),) + world.groups()
+	if previous is None or alpha >= 1:
+		for group in layers:
+			for sprite in group:
+				yield sprite.image, sprite.rect
+		return
+	get = previous.get
+	for group in layers:
+		for sprite in group:
+			x, y = sprite.rect.topleft
+			old = get(sprite)
+			if old is not None:
+				x, y = round(old[0] + (x - old[0]) * alpha), round(old[1] + (y - old[1]) * alpha)
+			yield sprite.image, (x, y)
+
+
+def frame_blits(world, previous=None, alpha=1.0):
+	# Sprites then trail dots, ready for one blits call
+	seq = list(sprites(world, previous, alpha))
+	seq += trail_blits(p.trace for p in world.projectiles if isinstance(p, SuperSniperBullet))
+	return seq
+
+
+# Redraws the whole frame and flips it to the display
+class Renderer:
+	def __init__(self, screen, hud):
+		self.screen, self.hud = screen, hud
+		self.updated_pixels = 0
+		self.previous = None
+		self.timer = null_timer
+
+	def snapshot(self, world):
+		self.previous = positions(world)
+
+	def invalidate(self):
+		self.previous = None
+
+	def draw(self, world, overlays=(), alpha=1.0):
+		screen, lap = self.screen, self.timer.lap
+		screen.fill(background_color)
+		lap('draw_clear')
+		screen.blits(frame_blits(world, self.previous, alpha), False)
+		lap('draw_sprites')
+		self.hud.draw(screen, world)
+		lap('draw_hud')
+		if overlays:
+			screen.blits(overlays, False)
+		lap('draw_overlays')
+		pygame.display.flip()
+		lap('display')
+		self.updated_pixels = screen.get_width() * screen.get_height()
+
+
+# Erases last frame's sprites from a static background and pushes only the changed rects to the display
+class DirtyRenderer(Renderer):
+	def __init__(self, screen, hud):
+		super().__init__(screen, hud)
+		self.background = pygame.Surface(screen.get_size())
+		self.background.fill(background_color)
+		self.drawn = []
+		self.full = True
+
+	def invalidate(self):
+		# Something else drew over the screen (a menu), next frame goes out whole
+		super().invalidate()
+		self.full = True
+
+	def draw(self, world, overlays=(), alpha=1.0):
+		screen, background, hud, lap = self.screen, self.background, self.hud, self.timer.lap
+		hud_dirty = hud.update(world)
+		lap('draw_hud')
+		seq = frame_blits(world, self.previous, alpha)
+		drawn = [pygame.Rect(pos[0], pos[1], *surface.get_size()) for surface, pos in seq + list(overlays)]
+		lap('draw_sprites')
+		if self.full:
+			screen.blit(background, (0, 0))
+			lap('draw_clear')
+			screen.blits(seq, False)
+			lap('draw_sprites')
+			screen.blit(hud.surface, (0, 0))
+			lap('draw_hud')
+			screen.blits(overlays, False)
+			lap('draw_overlays')
+			self.full = False
+			self.drawn = drawn
+			pygame.display.flip()
+			lap('display')
+			self.updated_pixels = screen.get_width() * screen.get_height()
+			return
+		# Every dirty area is rebuilt from the background up. The HUD has alpha, so it goes out once per text
+		# rect over the part the dirty rects touch, never twice over the same pixel
+		dirty = self.drawn + drawn + hud_dirty
+		hud_areas = []
+		for rect in hud.rects:
+			hits = [dirty[i] for i in rect.collidelistall(dirty)]
+			if hits:
+				hud_areas.append(rect.clip(hits[0].unionall(hits[1:])))
+		dirty += hud_areas
+		screen.blits([(background, rect, rect) for rect in dirty], False)
+		lap('draw_clear')
+		screen.blits(seq, False)
+		lap('draw_sprites')
+		hud_surface = hud.surface
+		screen.blits([(hud_surface, rect, rect) for rect in hud_areas], False)
+		lap('draw_hud')
+		screen.blits(overlays, False)
+		lap('draw_overlays')
+		self.drawn = drawn
+		# Rects can reach past the screen edge and overlaps are counted twice
+		pygame.display.update(dirty)
+		lap('display')
+		self.updated_pixels = sum(rect.w * rect.h for rect in dirty)
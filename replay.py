@@ -0,0 +1,125 @@
+import argparse
+import struct
+import time
+import zlib
+
+import numpy as np
+
+from engine import World, difficulty_settings, no_keys
+
+# Keys the simulation reads, one bit each in the per-step key byte
+recorded_keys = tuple(no_keys)
+difficulties = list(difficulty_settings)
+# Magic, version, seed, difficulty index, steps, level-up choices
+header = struct.Struct('<4sBQBII')
+magic, version = b'NSRP', 3
+
+
+def state_checksum(world):
+	# CRC of the player and every live enemy's position and health after a step
+	player, store = world.player, world.enemy_store
+	crc = zlib.crc32(struct.pack('<7i', player.rect.x, player.rect.y, player.health, player.exp, player.level,
+	                             len(world.enemy_list) + len(world.boss_list), len(world.projectiles)))
+	idx = store.live_slots()
+	for field in (store.x, store.y, store.health):
+		crc = zlib.crc32(field[idx].tobytes(), crc)
+	return crc
+
+
+def key_bits(keys):
+	bits = 0
+	for i, key in enumerate(recorded_keys):
+		if keys[key]:
+			bits |= 1 << i
+	return bits
+
+
+# Key state per mask, built once and shared by every replayed step
+key_states = [{key: bool(bits >> i & 1) for i, key in enumerate(recorded_keys)}
+              for bits in range(1 << len(recorded_keys))]
+
+
+# Records one run: a key byte and a checksum per step plus the index of every level-up choice,
+# so pending level ups have to be answered through its choose()
+class Recorder:
+	def __init__(self, world):
+		self.world = world
+		self.clear()
+
+	def clear(self):
+		# Call on world reset, the next run starts a new recording
+		self.keys, self.checksums, self.choices = bytearray(), [], bytearray()
+
+	def step(self, keys):
+		self.world.step(keys)
+		self.keys.append(key_bits(keys))
+		self.checksums.append(state_checksum(self.world))
+
+	def choose(self, name):
+		# Level ups are answered between steps, replay answers them at the same point
+		world = self.world
+		self.choices.append(world.pending_choices[0].index(name))
+		world.choose(name)
+
+	def save(self, path):
+		world = self.world
+		head = header.pack(magic, version, world.seed, difficulties.index(world.difficulty), len(self.keys),
+		                   len(self.choices))
+		body = bytes(self.keys) + np.array(self.checksums, np.uint32).tobytes() + bytes(self.choices)
+		with open(path, 'wb') as f:
+			f.write(head + zlib.compress(body, 9))
+
+
+class Recording:
+	def __init__(self, path):
+		with open(path, 'rb') as f:
+			data = f.read()
+		tag, file_version, self.seed, difficulty, steps, choices = header.unpack_from(data)
+		if tag != magic or file_version != version:
+			raise ValueError(f'{path} is not a version {version} recording')
+		self.difficulty = difficulties[difficulty]
+		body = zlib.decompress(data[header.size:])
+		self.keys = body[:steps]
+		self.checksums = np.frombuffer(body, np.uint32, steps, steps).tolist()
+		self.choices = body[steps + steps * 4:steps + steps * 4 + choices]
+
+	def replay(self, check=True):
+		# Plays the run back as fast as possible, returns the world and the first diverging step or None
+		world = World(self.difficulty, self.seed)
+		world.choose_weapon = None
+		choices, pending = iter(self.choices), world.pending_choices
+		checksums = self.checksums
+		for step, bits in enumerate(self.keys):
+			world.step(key_states[bits])
+			if check and state_checksum(world) != checksums[step]:
+				return world, step
+			while pending:
+				choice = next(choices, None)
+				if choice is None:
+					# Only the last step may leave a level up open (quit from the menu), earlier the log is short
+					return world, None if step == len(self.keys) - 1 else step
+				world.choose(pending[0][choice])
+		return world, None
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Replay a recorded session headlessly")
+	parser.add_argument('path')
+	parser.add_argument('--no-check', action='store_true', help='skip the per-step checksum, for timing runs')
+	args = parser.parse_args()
+	recording = Recording(args.path)
+	start = time.perf_counter()
+	world, diverged = recording.replay(not args.no_check)
+	duration = time.perf_counter() - start
+	steps = world.clock.frame
+	print(f'{steps} steps in {duration:.2f}s ({steps / max(duration, 1e-9):.0f} steps/s), '
+	      f'seed {recording.seed}, {recording.difficulty}, {len(recording.choices)} level-up choices')
+	if diverged is not None:
+		print(f'diverged at step {diverged}')
+		raise SystemExit(1)
+	print(f'LVL: {world.player.level} HP: {world.player.health}/{world.player.max_health} '
+	      f'game over: {world.game_over}')
+
+
+if __name__ == '__main__':
+	main()
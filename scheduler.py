@@ -0,0 +1,32 @@
+import heapq
+
+
+# Timed callbacks on simulation time, each one runs on the first step after it is due. Entries are
+# [when, order, callback, args] lists, order keeps ties in scheduling order and cancel() blanks one in place
+class Scheduler:
+	def __init__(self):
+		self.heap, self.order = [], 0
+
+	def clear(self):
+		self.heap.clear()
+		self.order = 0
+
+	def __len__(self):
+		return len(self.heap)
+
+	def at(self, when, callback, *args):
+		self.order += 1
+		entry = [when, self.order, callback, args]
+		heapq.heappush(self.heap, entry)
+		return entry
+
+	@staticmethod
+	def cancel(entry):
+		entry[2] = None
+
+	def run(self, now):
+		heap = self.heap
+		while heap and heap[0][0] < now:
+			_, _, callback, args = heapq.heappop(heap)
+			if callback is not None:
+				callback(*args)
@@ -0,0 +1,70 @@
+import numpy as np
+
+
+# Growable struct-of-arrays keyed by slot, each slot backs one sprite view
+class SlotStore:
+	fields = {}
+
+	def __init__(self, capacity=256):
+		self.capacity, self.size = 0, 0
+		self.free, self.dead = [], []
+		self.sprites = []
+		# Called with each sprite once its slot is recycled
+		self.on_recycle = None
+		self.alive = np.zeros(0, bool)
+		for name, dtype in self.fields.items():
+			setattr(self, name, np.zeros(0, dtype))
+		self.grow(capacity)
+
+	def grow(self, capacity):
+		for name in ('alive', *self.fields):
+			old = getattr(self, name)
+			new = np.zeros(capacity, old.dtype)
+			new[:self.capacity] = old
+			setattr(self, name, new)
+		self.sprites.extend([None] * (capacity - self.capacity))
+		self.capacity = capacity
+
+	def clear(self):
+		for sprite in self.sprites[:self.size]:
+			if sprite is not None:
+				sprite.slot = None
+		self.sprites = [None] * self.capacity
+		self.alive[:] = False
+		self.size = 0
+		self.free.clear()
+		self.dead.clear()
+
+	def alloc(self, sprite):
+		if self.free:
+			slot = self.free.pop()
+		else:
+			if self.size == self.capacity:
+				self.grow(self.capacity * 2)
+			slot = self.size
+			self.size += 1
+		self.sprites[slot], self.alive[slot] = sprite, True
+		return slot
+
+	def remove(self, slot):
+		# Slot is recycled by the next recycle(), until then the sprite can still read its state
+		if self.alive[slot]:
+			self.alive[slot] = False
+			self.dead.append(slot)
+
+	def live_slots(self):
+		return np.flatnonzero(self.alive[:self.size])
+
+	def release(self, sprite, slot):
+		pass
+
+	def recycle(self):
+		for slot in self.dead:
+			sprite = self.sprites[slot]
+			self.release(sprite, slot)
+			sprite.slot = None
+			self.sprites[slot] = None
+			if self.on_recycle:
+				self.on_recycle(sprite)
+		self.free.extend(self.dead)
+		self.dead.clear()
@@ -0,0 +1,58 @@
+import io
+import pickle
+import zlib
+
+import pygame
+
+import assets
+from frame_timer import null_timer
+
+
+# Whole-world snapshots: everything is pickled except shared assets and the hooks the caller owns
+class Pickler(pickle.Pickler):
+	def __init__(self, file, world):
+		super().__init__(file, pickle.HIGHEST_PROTOCOL)
+		self.images = {id(surface): key for key, surface in assets.images.items()}
+		# Hooks are left out and handed back by load()
+		self.hooks = {id(world.timer): 'timer', id(world.damage_events.subscribers): 'subscribers'}
+		if world.choose_weapon is not None:
+			self.hooks[id(world.choose_weapon)] = 'choose_weapon'
+
+	def persistent_id(self, obj):
+		if isinstance(obj, pygame.Surface):
+			key = self.images.get(id(obj))
+			if key is None:
+				raise pickle.PicklingError('only asset surfaces can be snapshotted')
+			return 'image', key
+		name = self.hooks.get(id(obj))
+		if name is not None:
+			return 'hook', name
+		return None
+
+
+class Unpickler(pickle.Unpickler):
+	def __init__(self, file, hooks):
+		super().__init__(file)
+		self.hooks = hooks
+
+	def persistent_load(self, pid):
+		kind, key = pid
+		if kind == 'image':
+			return assets.image(*key)
+		return self.hooks[key]
+
+
+def save(world):
+	buffer = io.BytesIO()
+	Pickler(buffer, world).dump(world)
+	return zlib.compress(buffer.getvalue(), 1)
+
+
+def first_choice(choices):
+	return choices[0]
+
+
+def load(data, choose_weapon=first_choice, timer=null_timer, subscribers=None):
+	# A new World in the saved state, each load is independent so many branches can start from one snapshot
+	hooks = {'choose_weapon': choose_weapon, 'timer': timer, 'subscribers': [] if subscribers is None else subscribers}
+	return Unpickler(io.BytesIO(zlib.decompress(data)), hooks).load()
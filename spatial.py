@@ -0,0 +1,112 @@
+import math
+
+
+# Uniform spatial hash, rebuilt once per frame for enemy broad-phase, nearest and radius queries
+class SpatialHash:
+	def __init__(self, cell_size=64):
+		self.cell_size = cell_size
+		self.cells = {}
+		self.order = {}
+		self.bounds = None
+
+	def clear(self):
+		self.cells.clear()
+		self.order.clear()
+		self.bounds = None
+
+	def cell_range(self, rect):
+		size = self.cell_size
+		return range(rect.left // size, (rect.right - 1) // size + 1), range(rect.top // size,
+		                                                                    (rect.bottom - 1) // size + 1)
+
+	def insert(self, sprite):
+		self.order[sprite] = len(self.order)
+		cells = self.cells
+		xs, ys = self.cell_range(sprite.rect)
+		for cx in xs:
+			for cy in ys:
+				cell = cells.get((cx, cy))
+				if cell is None:
+					cells[(cx, cy)] = [sprite]
+				else:
+					cell.append(sprite)
+		if self.bounds is None:
+			self.bounds = [xs.start, ys.start, xs.stop - 1, ys.stop - 1]
+		else:
+			bounds = self.bounds
+			bounds[0], bounds[1] = min(bounds[0], xs.start), min(bounds[1], ys.start)
+			bounds[2], bounds[3] = max(bounds[2], xs.stop - 1), max(bounds[3], ys.stop - 1)
+
+	def rebuild(self, *groups):
+		self.clear()
+		for group in groups:
+			for sprite in group:
+				self.insert(sprite)
+
+	def query_rect(self, rect):
+		# Live sprites colliding with rect, in insertion order like chained spritecollide calls
+		cells, found = self.cells, set()
+		xs, ys = self.cell_range(rect)
+		for cx in xs:
+			for cy in ys:
+				for sprite in cells.get((cx, cy), ()):
+					if sprite not in found and sprite.alive() and rect.colliderect(sprite.rect):
+						found.add(sprite)
+		return self.sorted(found)
+
+	def within(self, pos, radius):
+		# Live sprites whose center is at most radius away from pos
+		cells, found, seen = self.cells, set(), set()
+		px, py = pos
+		size = self.cell_size
+		for cx in range(int(px - radius) // size, int(px + radius) // size + 1):
+			for cy in range(int(py - radius) // size, int(py + radius) // size + 1):
+				for sprite in cells.get((cx, cy), ()):
+					if sprite in seen:
+						continue
+					seen.add(sprite)
+					if sprite.alive() and math.hypot(px - sprite.rect.centerx, py - sprite.rect.centery) <= radius:
+						found.add(sprite)
+		return self.sorted(found)
+
+	def nearest(self, pos):
+		# Ring search outwards from pos's cell, stops once no unseen cell can hold a closer center
+		if self.bounds is None:
+			return None
+		cells, order, size = self.cells, self.order, self.cell_size
+		px, py = pos
+		cx, cy = int(px) // size, int(py) // size
+		min_x, min_y, max_x, max_y = self.bounds
+		max_ring = max(cx - min_x, max_x - cx, cy - min_y, max_y - cy)
+		best, best_key, seen = None, None, set()
+		for ring in range(max_ring + 1):
+			if best_key is not None and best_key[0] < (ring - 1) * size:
+				break
+			for key in self.ring_cells(cx, cy, ring):
+				for sprite in cells.get(key, ()):
+					if sprite in seen:
+						continue
+					seen.add(sprite)
+					if not sprite.alive():
+						continue
+					sprite_key = (math.hypot(px - sprite.rect.centerx, py - sprite.rect.centery), order[sprite])
+					if best_key is None or sprite_key < best_key:
+						best, best_key = sprite, sprite_key
+		return best
+
+	@staticmethod
+	def ring_cells(cx, cy, ring):
+		if ring == 0:
+			yield cx, cy
+			return
+		for x in range(cx - ring, cx + ring + 1):
+			yield x, cy - ring
+			yield x, cy + ring
+		for y in range(cy - ring + 1, cy + ring):
+			yield cx - ring, y
+			yield cx + ring, y
+
+	def sorted(self, found):
+		if len(found) > 1:
+			return sorted(found, key=self.order.__getitem__)
+		return list(found)
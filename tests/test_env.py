@@ -0,0 +1,23 @@
+import numpy as np
+
+from env import VectorEnv, num_actions
+
+
+def run(seed, steps=1500):
+	vec = VectorEnv(2, max_steps=200)
+	observations = [vec.reset(seed=seed)[0].copy()]
+	rng = np.random.default_rng(0)
+	episodes = 0
+	for _ in range(steps):
+		obs, _, terminated, truncated, _ = vec.step(rng.integers(0, num_actions, 2))
+		episodes += int((terminated | truncated).sum())
+		observations.append(obs.copy())
+	return np.array(observations), episodes, [env.world.seed for env in vec.envs]
+
+
+def test_auto_resets_are_reproducible():
+	first, episodes, seeds = run(0)
+	second, _, second_seeds = run(0)
+	assert episodes >= 2
+	assert seeds == second_seeds
+	assert np.array_equal(first, second)
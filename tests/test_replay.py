@@ -0,0 +1,63 @@
+import random
+
+import replay
+from engine import World
+
+
+def record(path, seed, steps, answer=True):
+	# Random keys and random level-up picks, answered right away unless answer is off
+	world = World('Normal', seed)
+	world.choose_weapon = None
+	recorder = replay.Recorder(world)
+	rng = random.Random(seed)
+	for _ in range(steps):
+		if world.game_over or world.pending_choices:
+			break
+		recorder.step(replay.key_states[rng.randrange(len(replay.key_states))])
+		while answer and world.pending_choices:
+			recorder.choose(rng.choice(world.pending_choices[0]))
+	recorder.save(path)
+	return world, recorder
+
+
+def test_round_trip(tmp_path):
+	path = tmp_path / 'run.nsrp'
+	world, recorder = record(path, 3, 3000)
+	assert recorder.choices
+	recording = replay.Recording(path)
+	assert (recording.seed, recording.difficulty) == (3, 'Normal')
+	assert bytes(recording.keys) == bytes(recorder.keys)
+	replayed, diverged = recording.replay()
+	assert diverged is None
+	assert replay.state_checksum(replayed) == replay.state_checksum(world)
+	assert replayed.player.weapons.keys() == world.player.weapons.keys()
+
+
+def test_divergence_is_reported(tmp_path):
+	path = tmp_path / 'run.nsrp'
+	record(path, 5, 300)
+	recording = replay.Recording(path)
+	recording.checksums[100] ^= 1
+	assert recording.replay()[1] == 100
+
+
+def test_quit_with_level_up_open(tmp_path):
+	# game.py saves the run when the player quits from the level-up menu, the last offer has no answer
+	path = tmp_path / 'run.nsrp'
+	world, recorder = record(path, 3, 3000, answer=False)
+	assert world.pending_choices and not recorder.choices
+	replayed, diverged = replay.Recording(path).replay()
+	assert diverged is None
+	assert replayed.clock.frame == world.clock.frame
+	assert replay.state_checksum(replayed) == replay.state_checksum(world)
+
+
+def test_missing_choice_before_the_end_diverges(tmp_path):
+	path = tmp_path / 'run.nsrp'
+	world, recorder = record(path, 3, 3000)
+	assert len(recorder.choices) > 1
+	recording = replay.Recording(path)
+	recording.choices = recording.choices[:1]
+	replayed, diverged = recording.replay()
+	assert diverged is not None and diverged < len(recording.keys) - 1
+	assert replayed.clock.frame == diverged + 1
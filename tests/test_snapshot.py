@@ -0,0 +1,34 @@
+import replay
+import snapshot
+from engine import World, no_keys
+
+
+def play(world, steps):
+	checksums = []
+	for _ in range(steps):
+		if world.game_over:
+			break
+		world.step(no_keys)
+		checksums.append(replay.state_checksum(world))
+	return checksums
+
+
+def test_branches_step_identically():
+	world = World('Normal', 7)
+	play(world, 1500)
+	data = snapshot.save(world)
+	first, second = snapshot.load(data), snapshot.load(data)
+	assert first is not second and first.player is not second.player
+	assert replay.state_checksum(first) == replay.state_checksum(world)
+	expected = play(world, 2600)
+	assert play(first, 2600) == expected
+	assert play(second, 2600) == expected
+
+
+def test_hooks_are_handed_back():
+	world = World('Normal', 4)
+	play(world, 200)
+	calls = []
+	loaded = snapshot.load(snapshot.save(world), choose_weapon=None, subscribers=[calls.append])
+	assert loaded.choose_weapon is None
+	assert loaded.damage_events.subscribers == [calls.append]
@@ -0,0 +1,56 @@
+import math
+import random
+
+import pygame
+
+from spatial import SpatialHash
+
+
+def scene(seed, count=300):
+	# Sprites on a coarse grid so equal distances happen, some off screen, a few killed after the rebuild
+	rng = random.Random(seed)
+	group = pygame.sprite.Group()
+	for _ in range(count):
+		sprite = pygame.sprite.Sprite()
+		size = rng.choice((10, 40, 60))
+		sprite.rect = pygame.Rect(0, 0, size, size)
+		sprite.rect.center = (rng.randrange(-100, 900, 20), rng.randrange(-100, 700, 20))
+		group.add(sprite)
+	grid = SpatialHash()
+	grid.rebuild(group)
+	sprites = list(group)
+	for sprite in rng.sample(sprites, count // 10):
+		sprite.kill()
+	return grid, sprites, rng
+
+
+def distance(pos, sprite):
+	return math.hypot(pos[0] - sprite.rect.centerx, pos[1] - sprite.rect.centery)
+
+
+def test_nearest_matches_full_scan():
+	grid, sprites, rng = scene(1)
+	live = [s for s in sprites if s.alive()]
+	for _ in range(500):
+		pos = (rng.randrange(-200, 1000, 10), rng.randrange(-200, 800, 10))
+		# min keeps the first of equally close sprites, in insertion order
+		assert grid.nearest(pos) is min(live, key=lambda s: distance(pos, s))
+
+
+def test_nearest_empty():
+	assert SpatialHash().nearest((0, 0)) is None
+
+
+def test_within_matches_full_scan():
+	grid, sprites, rng = scene(2)
+	for _ in range(300):
+		pos, radius = (rng.randrange(-100, 900), rng.randrange(-100, 700)), rng.choice((0, 20, 50, 130, 400))
+		assert grid.within(pos, radius) == [s for s in sprites if s.alive() and distance(pos, s) <= radius]
+
+
+def test_query_rect_matches_full_scan():
+	grid, sprites, rng = scene(3)
+	for _ in range(300):
+		rect = pygame.Rect(rng.randrange(-100, 900), rng.randrange(-100, 700), rng.randrange(1, 200),
+		                   rng.randrange(1, 200))
+		assert grid.query_rect(rect) == [s for s in sprites if s.alive() and rect.colliderect(s.rect)]
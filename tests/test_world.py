@@ -0,0 +1,35 @@
+import pytest
+
+from engine import Enemy, Swarm, World
+
+
+def test_choose_rejects_unoffered_weapon():
+	world = World('Normal', 1)
+	world.choose_weapon = None
+	world.player.add_exp(world.player.exp_to_lvl)
+	choices = list(world.pending_choices[0])
+	missing = next(name for name in world.weapon_classes if name not in choices)
+	with pytest.raises(ValueError):
+		world.choose(missing)
+	assert list(world.pending_choices) == [choices]
+	world.choose(choices[0])
+	assert not world.pending_choices and choices[0] in world.player.weapons
+
+
+def test_enemy_budget_is_a_hard_cap():
+	world = World('Normal', 2)
+	world.enemy_budget, world.swarm_size = 20, 3
+	for _ in range(20):
+		world.spawn_enemy(Enemy(world, 10))
+	for _ in range(100):
+		world.fold_spawn(10)
+	store = world.enemy_store
+	idx = store.live_slots()
+	assert len(world.enemy_list) == len(idx) == 20
+	assert store.health[idx].sum() == 120 * 10
+	assert store.exp[idx].sum() == 120 * 20
+	assert store.contact_damage[idx].sum() == 120 * 10
+	# Every spawn is still accounted for, either as a regular enemy or as a swarm member
+	regular = sum(not isinstance(enemy, Swarm) for enemy in world.enemy_list)
+	assert regular + sum(swarm.members for swarm in world.swarms) == 120
+	assert all(swarm.alive() for swarm in world.swarms)
@@ -0,0 +1,51 @@
+import assets
+
+
+# Fixed-size ring buffer of recent positions, oldest first when iterated
+class Trail:
+	def __init__(self, size, color=(0, 255, 0), radius=2):
+		self.size, self.color, self.radius = size, color, radius
+		self.points = [None] * size
+		self.head, self.count = 0, 0
+
+	def clear(self):
+		self.head, self.count = 0, 0
+
+	def append(self, pos):
+		self.points[self.head] = pos
+		self.head = (self.head + 1) % self.size
+		if self.count < self.size:
+			self.count += 1
+
+	def __len__(self):
+		return self.count
+
+	def __iter__(self):
+		points, size = self.points, self.size
+		start = (self.head - self.count) % size
+		for i in range(self.count):
+			yield points[(start + i) % size]
+
+
+# Dot surfaces fading in from oldest to newest point, one ramp per trail length
+ramps = {}
+
+
+def dot_ramp(length, color, radius):
+	key = (length, color, radius)
+	ramp = ramps.get(key)
+	if ramp is None:
+		size = (radius * 2, radius * 2)
+		ramp = ramps[key] = [assets.image('circle', size, (*color, int(255 * (i + 1) / length))) for i in range(length)]
+	return ramp
+
+
+def trail_blits(trails):
+	# Every dot of every trail as (image, pos) pairs, for one blits call
+	seq = []
+	for trail in trails:
+		if not trail.count:
+			continue
+		r = trail.radius
+		seq.extend((dot, (x - r, y - r)) for dot, (x, y) in zip(dot_ramp(trail.count, trail.color, r), trail))
+	return seq